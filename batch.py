@@ -0,0 +1,172 @@
+import argparse
+import glob
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from cache import ProgramCache, parse_source, source_key
+from embed import BhaiProgram
+
+# Status of each script in a run-many report
+STATUSES = ('ok', 'syntax_error', 'error', 'crash', 'missing')
+
+def find_scripts(paths):
+    # Directories are searched recursively for .bhai files. Any other file
+    # that isn't a .bhai script is a manifest: one path per line, relative
+    # to the manifest, with # comments and blank lines ignored. A script
+    # listed twice is only run once. A path that doesn't exist is kept as
+    # a script, so the report lists it as missing.
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            scripts.extend(sorted(glob.glob(os.path.join(path, '**', '*.bhai'), recursive=True)))
+        elif path.endswith('.bhai') or not os.path.exists(path):
+            scripts.append(path)
+        else:
+            base = os.path.dirname(path)
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        scripts.append(os.path.join(base, line))
+    return list(dict.fromkeys(os.path.normpath(script) for script in scripts))
+
+def result(path, status, seconds=0.0, output='', error=None, value=None):
+    return {
+        'path': path,
+        'status': status,
+        'seconds': seconds,
+        'output': output,
+        'error': error,
+        'value': value if value is None or isinstance(value, (int, float, str)) else repr(value),
+    }
+
+def group_scripts(scripts, jobs):
+    # Scripts with the same contents are parsed once and run together.
+    # A very common script is split into at most `jobs` pieces so it can
+    # still use every core.
+    groups = {}
+    results = []
+    for path in scripts:
+        try:
+            with open(path, encoding='utf-8') as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            results.append(result(path, 'missing', error=str(e)))
+            continue
+        key = source_key(source)
+        if key not in groups:
+            groups[key] = (source, [])
+        groups[key][1].append(path)
+
+    tasks = []
+    for source, paths in groups.values():
+        size = -(-len(paths) // jobs)
+        for start in range(0, len(paths), size):
+            tasks.append((source, paths[start:start + size]))
+    return tasks, results, len(groups)
+
+def run_group(task, engine='vm', use_cache=True, limits=None):
+    source, paths = task
+    try:
+        if use_cache:
+            ast = ProgramCache().parse(paths[0], source)
+        else:
+            ast = parse_source(source)
+        program = BhaiProgram(source, engine, ast=ast, **(limits or {}))
+    except SyntaxError as e:
+        return [result(path, 'syntax_error', error=str(e)) for path in paths]
+    except RuntimeError as e:
+        return [result(path, 'error', error=str(e)) for path in paths]
+    except Exception as e:
+        # A bug in parsing or compiling one script mustn't stop the others
+        return [result(path, 'crash', error=f'{type(e).__name__}: {e}') for path in paths]
+
+    results = []
+    for path in paths:
+        output = io.StringIO()
+        start = time.perf_counter()
+        try:
+            value = program.run(output=output)
+            status, error = 'ok', None
+        except RuntimeError as e:
+            value, status, error = None, 'error', str(e)
+        except Exception as e:
+            value, status, error = None, 'crash', f'{type(e).__name__}: {e}'
+        results.append(result(path, status, time.perf_counter() - start,
+                              output.getvalue(), error, value))
+    return results
+
+def run_group_task(args):
+    return run_group(*args)
+
+def run_many(scripts, engine='vm', jobs=None, use_cache=True, limits=None):
+    # Results come back in the order the scripts were given
+    jobs = jobs or os.cpu_count() or 1
+    tasks, results, unique = group_scripts(scripts, jobs)
+    work = [(task, engine, use_cache, limits) for task in tasks]
+    if jobs == 1 or len(work) <= 1:
+        batches = list(map(run_group_task, work))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            batches = list(pool.map(run_group_task, work,
+                                    chunksize=max(1, len(work) // (jobs * 8))))
+    for batch in batches:
+        results.extend(batch)
+
+    order = {path: n for n, path in enumerate(scripts)}
+    results.sort(key=lambda r: order[r['path']])
+    return results, unique
+
+def print_report(results, unique, elapsed):
+    for r in results:
+        line = f"{r['status']:<13} {r['seconds'] * 1000:9.2f} ms  {r['path']}"
+        if r['error']:
+            # First line of the message is enough here; --json has the rest
+            first = next((l for l in r['error'].splitlines() if l.strip()), '')
+            line += f"\n{'':<13} {first.strip()}"
+        print(line)
+
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    summary = ', '.join(f"{counts[s]} {s}" for s in STATUSES if s in counts)
+    print(f"\n{len(results)} scripts ({unique} unique) in {elapsed:.2f}s: {summary or 'nothing to run'}")
+
+def main(argv, engines):
+    arg_parser = argparse.ArgumentParser(prog='bhai run-many',
+                                         description='Run many .bhai scripts in parallel')
+    arg_parser.add_argument('paths', nargs='+',
+                            help='directories, .bhai files or manifests listing one script per line')
+    arg_parser.add_argument('--engine', choices=sorted(engines), default='vm')
+    arg_parser.add_argument('--jobs', '-j', type=int, default=None,
+                            help='worker processes (default: one per CPU)')
+    arg_parser.add_argument('--json', metavar='PATH',
+                            help="write each script's status, time, output and error as JSON")
+    arg_parser.add_argument('--max-steps', type=int, metavar='N')
+    arg_parser.add_argument('--max-seconds', type=float, metavar='S')
+    arg_parser.add_argument('--max-size', type=int, metavar='N')
+    arg_parser.add_argument('--max-depth', type=int, default=1000, metavar='N')
+    arg_parser.add_argument('--vector', action='store_true',
+                            help='+ - * / on number lists work element by element')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='always re-parse instead of using __bhaicache__')
+    args = arg_parser.parse_args(argv)
+
+    limits = {'max_steps': args.max_steps, 'max_seconds': args.max_seconds,
+              'max_size': args.max_size, 'max_depth': args.max_depth, 'vector': args.vector}
+    start = time.perf_counter()
+    results, unique = run_many(find_scripts(args.paths), args.engine, args.jobs,
+                               not args.no_cache, limits)
+    print_report(results, unique, time.perf_counter() - start)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Results saved to {args.json}")
+
+    if any(r['status'] != 'ok' for r in results):
+        print("\nBhai, kuch scripts fail ho gayi! 😬")
+        return 1
+    return 0
@@ -0,0 +1,165 @@
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import time
+from tokenizer import Tokenizer
+from parser import Parser
+from optimizer import optimize
+from interpreter import __version__
+from output import BufferedOutput
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+PHASES = ('tokenize', 'parse', 'execute')
+
+# Parsing workload: lots of small functions, each called once
+LARGE_SNIPPET = '''kaam kaam_{n}(a, b) {{
+    bhai total = jod(guna(a, {n}), ghata(b, 3));
+    agar (total bada 100) {{
+        wapas [total, a, b, "bada {n}"];
+    }} nahi_toh {{
+        total = bhag_kar(total, 2) + a * b - 1;
+    }}
+    har_ek x in range(2) {{
+        total = jod(total, x);
+    }}
+    wapas total;
+}}
+bhai x_{n} = kaam_{n}({n}, -4);
+'''
+
+def large_program(blocks=1000):
+    return ''.join(LARGE_SNIPPET.format(n=n) for n in range(blocks))
+
+def default_workloads():
+    workloads = []
+    for path in sorted(glob.glob(os.path.join(BENCH_DIR, '*.bhai'))):
+        with open(path, encoding='utf-8') as f:
+            workloads.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    workloads.append(('large_parse', large_program()))
+    return workloads
+
+def load_workloads(paths):
+    if not paths:
+        return default_workloads()
+    workloads = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            workloads.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return workloads
+
+def measure(func, warmup, repeat):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def summarize(name, phase, times, tokens=None):
+    median = statistics.median(times)
+    result = {
+        'workload': name,
+        'phase': phase,
+        'runs': len(times),
+        'best': min(times),
+        'median': median,
+        'mean': statistics.fmean(times),
+        'ops_per_sec': 1 / median if median else None,
+    }
+    if tokens is not None:
+        result['tokens_per_sec'] = tokens / median if median else None
+    return result
+
+def bench_workload(name, source, engine_class, warmup=1, repeat=5):
+    tokens = Tokenizer(source).tokenize()
+    program = optimize(Parser(tokens).parse())
+
+    def execute():
+        sink = BufferedOutput(io.StringIO(), policy='program')
+        engine_class(output=sink).execute(program)
+
+    return [
+        summarize(name, 'tokenize', measure(lambda: Tokenizer(source).tokenize(), warmup, repeat),
+                  len(tokens)),
+        summarize(name, 'parse', measure(lambda: optimize(Parser(tokens).parse()), warmup, repeat),
+                  len(tokens)),
+        summarize(name, 'execute', measure(execute, warmup, repeat)),
+    ]
+
+def run_suite(workloads, engine_class, warmup=1, repeat=5, engine='vm'):
+    results = []
+    for name, source in workloads:
+        results.extend(bench_workload(name, source, engine_class, warmup, repeat))
+    return {
+        'bhai_version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': engine,
+        'warmup': warmup,
+        'repeat': repeat,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+def print_report(report):
+    print(f"Bhai-Lang {report['bhai_version']} on Python {report['python']}, "
+          f"engine={report['engine']}, warmup={report['warmup']}, repeat={report['repeat']}")
+    print(f"{'workload':<14} {'phase':<9} {'median ms':>10} {'best ms':>10} {'ops/sec':>10} {'tokens/sec':>12}")
+    for r in report['results']:
+        tokens = f"{r['tokens_per_sec']:12,.0f}" if r.get('tokens_per_sec') else ' ' * 12
+        print(f"{r['workload']:<14} {r['phase']:<9} {r['median'] * 1000:10.2f} "
+              f"{r['best'] * 1000:10.2f} {r['ops_per_sec']:10.1f} {tokens}")
+
+def compare(report, baseline, threshold=10.0):
+    # Returns the (workload, phase) pairs that got slower than the threshold
+    before = {(r['workload'], r['phase']): r['median'] for r in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline.get('bhai_version', '?')} ({baseline.get('created', '?')}):")
+    for r in report['results']:
+        key = (r['workload'], r['phase'])
+        if key not in before or not before[key]:
+            continue
+        change = 100 * (r['median'] - before[key]) / before[key]
+        flag = ''
+        if change > threshold:
+            regressions.append(key)
+            flag = '  <-- slower'
+        print(f"{r['workload']:<14} {r['phase']:<9} {change:+7.1f}%{flag}")
+    return regressions
+
+def main(argv, engines):
+    arg_parser = argparse.ArgumentParser(prog='bhai bench',
+                                         description='Time tokenize, parse and execute')
+    arg_parser.add_argument('workloads', nargs='*',
+                            help='.bhai files to time (default: benchmarks/*.bhai and a large generated file)')
+    arg_parser.add_argument('--engine', choices=sorted(engines), default='vm')
+    arg_parser.add_argument('--warmup', type=int, default=1, help='untimed runs first (default 1)')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='timed runs (default 5)')
+    arg_parser.add_argument('--json', metavar='PATH', help='write results as JSON')
+    arg_parser.add_argument('--compare', metavar='PATH', help='JSON results to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=10.0,
+                            help='percent slowdown counted as a regression (default 10)')
+    args = arg_parser.parse_args(argv)
+
+    report = run_suite(load_workloads(args.workloads), engines[args.engine],
+                       args.warmup, max(args.repeat, 1), args.engine)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            print("\nBhai, kuch cheezein slow ho gayi hain! 🐢")
+            return 1
+    return 0
@@ -0,0 +1,97 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser as bhai_parser
+import tokenizer as bhai_tokenizer
+from parser import ASTNode, Parser
+from tokenizer import Tokenizer
+
+SNIPPET = '''kaam kaam_{n}(a, b) {{
+    bhai total = jod(guna(a, {n}), ghata(b, 3));
+    agar (total bada 100) {{
+        wapas [total, a, b];
+    }} nahi_toh {{
+        total = bhag_kar(total, 2) + a * b - 1;
+    }}
+    jab_tak (total chota 10) {{
+        total = jod(total, 1);
+    }}
+    wapas total;
+}}
+bhai x_{n} = kaam_{n}({n}, -4);
+bhai bol(x_{n});
+'''
+
+def generate(blocks):
+    return ''.join(SNIPPET.format(n=n) for n in range(blocks))
+
+NODE_NAMES = {cls.__name__ for cls in vars(bhai_parser).values()
+              if isinstance(cls, type) and issubclass(cls, ASTNode)}
+
+def fields(item):
+    if hasattr(item, '__dict__'):
+        return list(vars(item).values())
+    return [getattr(item, name, None) for name in type(item).__slots__]
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif type(item).__name__ in NODE_NAMES:
+            count += 1
+            stack.extend(fields(item))
+    return count
+
+def dict_backed_classes():
+    # Plain-class twins of every AST node and Token, i.e. the layout before
+    # __slots__: same __init__, attributes stored in a per-instance __dict__.
+    twins = {}
+    for name in NODE_NAMES | {'Token'}:
+        original = getattr(bhai_parser, name)
+        twins[name] = type(name, (), {'__init__': original.__init__})
+    return twins
+
+def measure(code):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    ast = Parser(Tokenizer().stream(code.splitlines(True))).parse()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, count_nodes(ast)
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    code = generate(blocks)
+    print(f"Source: {len(code):,} characters")
+
+    slotted_bytes, nodes = measure(code)
+
+    twins = dict_backed_classes()
+    saved = {name: getattr(bhai_parser, name) for name in twins}
+    saved_token = bhai_tokenizer.Token
+    try:
+        for name, twin in twins.items():
+            setattr(bhai_parser, name, twin)
+        bhai_tokenizer.Token = twins['Token']
+        dict_bytes, dict_nodes = measure(code)
+    finally:
+        for name, original in saved.items():
+            setattr(bhai_parser, name, original)
+        bhai_tokenizer.Token = saved_token
+
+    print(f"AST nodes: {nodes:,}")
+    print(f"before (__dict__): {dict_bytes:12,} bytes  {dict_bytes / dict_nodes:7.1f} bytes/node")
+    print(f"after (__slots__): {slotted_bytes:12,} bytes  {slotted_bytes / nodes:7.1f} bytes/node")
+    print(f"Saved: {100 * (1 - slotted_bytes / dict_bytes):.0f}%")
+
+if __name__ == "__main__":
+    main()
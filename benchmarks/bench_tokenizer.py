@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokenizer import Tokenizer
+
+SNIPPET = '''// generated block {n}
+kaam kaam_{n}(a, b) {{
+    bhai naam_{n} = "Namaste \\"bhai\\" number {n}\\n";
+    agar (a bada b) {{
+        wapas jod(guna(a, {n}), 3.25);
+    }} nahi_toh {{
+        wapas [a, b, ghata(b, a), bhag_kar(a, 7)];
+    }}
+}}
+bhai x_{n} = kaam_{n}({n}, 42);
+'''
+
+def generate(size):
+    parts = []
+    length = 0
+    n = 0
+    while length < size:
+        block = SNIPPET.format(n=n)
+        parts.append(block)
+        length += len(block)
+        n += 1
+    return ''.join(parts)
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    code = generate(size)
+    print(f"Source: {len(code):,} characters")
+
+    slow_time, slow_tokens = best_of(repeat, lambda: Tokenizer(code).tokenize_chars())
+    fast_time, fast_tokens = best_of(repeat, lambda: Tokenizer(code).tokenize())
+
+    same = [(t.type, t.value, t.line, t.column) for t in slow_tokens] == \
+           [(t.type, t.value, t.line, t.column) for t in fast_tokens]
+
+    count = len(fast_tokens)
+    print(f"Tokens: {count:,} (identical streams: {same})")
+    print(f"tokenize_chars: {slow_time:8.3f}s  {count / slow_time:14,.0f} tokens/s")
+    print(f"tokenize:       {fast_time:8.3f}s  {count / fast_time:14,.0f} tokens/s")
+    print(f"Speedup: {slow_time / fast_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
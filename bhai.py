@@ -1,21 +1,45 @@
 import sys
+import argparse
 from tokenizer import Tokenizer
 from parser import Parser
-from interpreter import BhaiInterpreter
+from interpreter import __version__
+from cache import ProgramCache
+from optimizer import optimize
+from output import BufferedOutput, FLUSH_POLICIES
+import bench
+import batch
+from profiler import ProfilingInterpreter
+# Embedding API: bhai.compile(source).run(globals=..., output=...)
+from embed import ENGINES, BhaiProgram, compile
+# @bhai.builtin('name', min_args, max_args) adds a native builtin
+from stdlib import builtin
+from incremental import unfinished
 
-def run_file(filename):
+def run_file(filename, engine='vm', use_cache=True, flush=None, profile=False, folded=None,
+             limits=None):
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            code = f.read()
+        if use_cache:
+            ast = ProgramCache().parse_file(filename)
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                parser = Parser(Tokenizer().stream(f))
+                ast = optimize(parser.parse())
 
-        tokenizer = Tokenizer(code)
-        tokens = tokenizer.tokenize()
+        output = BufferedOutput(policy=flush)
+        if profile or folded:
+            # Profiling runs on the tree-walker, which sees every statement
+            interpreter = ProfilingInterpreter(output=output, **(limits or {}))
+        else:
+            interpreter = ENGINES[engine](output=output, **(limits or {}))
 
-        parser = Parser(tokens)
-        ast = parser.parse()
-
-        interpreter = BhaiInterpreter()
-        interpreter.execute(ast)
+        try:
+            interpreter.execute(ast)
+        finally:
+            if profile:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    interpreter.report(f.read())
+            if folded:
+                interpreter.write_folded(folded)
         
     except FileNotFoundError:
         print(f"❌ Error: File '{filename}' nahi mili bhai!")
@@ -28,19 +52,22 @@ def run_file(filename):
         print(f"❌ Unexpected Error: {e}")
         print("Bhai, kuch toh gadbad hai! 😰")
 
-def repl():
+def repl(engine='vm'):
     print("=" * 50)
-    print("🇮🇳  BHAI-LANG REPL v0.1.0  🇮🇳")
+    print(f"🇮🇳  BHAI-LANG REPL v{__version__}  🇮🇳")
     print("=" * 50)
     print("Namaste! Type 'bye' to exit.")
     print("Type 'help' for examples.")
     print()
     
-    interpreter = BhaiInterpreter()
+    interpreter = ENGINES[engine]()
     
     while True:
         try:
             code = input(">>> ")
+            # Blocks can be typed over several lines
+            while unfinished(code):
+                code += "\n" + input("... ")
             
             if code.strip() == "bye":
                 print("Phir milenge, bhai! 👋")
@@ -57,7 +84,7 @@ def repl():
             tokens = tokenizer.tokenize()
 
             parser = Parser(tokens)
-            ast = parser.parse()
+            ast = optimize(parser.parse())
 
             interpreter.execute(ast)
             
@@ -79,7 +106,9 @@ Variables:      bhai x = 10;
 Math:           bhai bol(jod(5, 3));   // 8
 If/Else:        agar (x > 5) { ... } nahi_toh { ... }
 While:          jab_tak (x < 10) { ... }
+For each:       har_ek item in [1, 2, 3] { ... }
 Functions:      kaam greet(naam) { bhai bol(naam); }
+Memoized:       yaad_rakh kaam fib(n) { ... }
 
 Examples:
   bhai bol("Namaste!");
@@ -93,11 +122,55 @@ Examples:
 """)
 
 def main():
-    if len(sys.argv) < 2:
-        repl()
+    if sys.argv[1:2] == ['bench']:
+        sys.exit(bench.main(sys.argv[2:], ENGINES))
+    if sys.argv[1:2] == ['run-many']:
+        sys.exit(batch.main(sys.argv[2:], ENGINES))
+
+    arg_parser = argparse.ArgumentParser(prog='bhai', description='Bhai-Lang interpreter')
+    arg_parser.add_argument('filename', nargs='?',
+                            help=".bhai file to run (REPL if omitted, 'bench' for the benchmark suite, "
+                                 "'run-many' to run a directory of scripts in parallel)")
+    arg_parser.add_argument('--engine', choices=sorted(ENGINES), default='vm',
+                            help='bytecode VM (default) or the reference tree-walker')
+    arg_parser.add_argument('--flush', choices=FLUSH_POLICIES,
+                            help='when bol output is written: every line, every 8KB, '
+                                 'or at the end (default: line on a terminal, size otherwise)')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='print time and run counts per statement and kaam to stderr')
+    arg_parser.add_argument('--folded', metavar='PATH',
+                            help='write folded stacks for flamegraph.pl/speedscope')
+    arg_parser.add_argument('--max-steps', type=int, metavar='N',
+                            help='stop after N loop iterations and kaam calls')
+    arg_parser.add_argument('--max-seconds', type=float, metavar='S',
+                            help='stop after S seconds of wall-clock time')
+    arg_parser.add_argument('--max-size', type=int, metavar='N',
+                            help='largest list or string a + may build')
+    arg_parser.add_argument('--max-depth', type=int, default=1000, metavar='N',
+                            help='deepest kaam recursion allowed (default: 1000)')
+    arg_parser.add_argument('--vector', action='store_true',
+                            help='+ - * / on number lists work element by element '
+                                 '(through NumPy when it is installed)')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='always re-parse instead of using __bhaicache__')
+    arg_parser.add_argument('--clear-cache', action='store_true',
+                            help="delete the script's __bhaicache__ directory first")
+    args = arg_parser.parse_args()
+
+    if args.clear_cache:
+        ProgramCache().clear(args.filename or '.')
+        if args.filename is None:
+            print("Cache saaf ho gaya! 🧹")
+            return
+
+    if args.filename is None:
+        repl(args.engine)
     else:
-        filename = sys.argv[1]
-        run_file(filename)
+        run_file(args.filename, args.engine, use_cache=not args.no_cache, flush=args.flush,
+                 profile=args.profile, folded=args.folded,
+                 limits={'max_steps': args.max_steps, 'max_seconds': args.max_seconds,
+                         'max_size': args.max_size, 'max_depth': args.max_depth,
+                         'vector': args.vector})
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import parser
+from tokenizer import Token, Tokenizer
+from parser import Parser, ASTNode
+from optimizer import optimize
+from interpreter import __version__
+
+CACHE_DIR = '__bhaicache__'
+CACHE_SUFFIX = '.bhaic'
+# Bump when the AST classes change shape so old entries are never loaded
+CACHE_FORMAT = 8
+MAGIC = b'BHAIC\n'
+
+# Entries are JSON, not pickle: anyone who can write next to a script can
+# write its cache, so loading one must not be able to run code. A node is
+# {"@": class name, slot: value, ...} and only AST classes and Token are
+# ever built from it.
+NODE_TYPES = {cls.__name__: cls for cls in vars(parser).values()
+              if isinstance(cls, type) and issubclass(cls, ASTNode)}
+NODE_TYPES['Token'] = Token
+
+# Filled in at run time with Python objects; stored as None
+RUNTIME_SLOTS = frozenset(('handler', 'builtin'))
+
+SLOTS = {}
+
+def node_slots(cls):
+    names = SLOTS.get(cls)
+    if names is None:
+        names = SLOTS[cls] = frozenset(name for klass in cls.__mro__
+                                       for name in getattr(klass, '__slots__', ()))
+    return names
+
+def encode_node(node):
+    if type(node).__name__ not in NODE_TYPES:
+        raise TypeError(f"Can't cache a {type(node).__name__}")
+    fields = {'@': type(node).__name__}
+    for name in node_slots(type(node)):
+        value = getattr(node, name, fields)
+        if value is not fields:
+            fields[name] = None if name in RUNTIME_SLOTS else value
+    return fields
+
+def decode_node(fields):
+    cls = NODE_TYPES[fields.pop('@')]
+    node = cls.__new__(cls)
+    allowed = node_slots(cls)
+    for name, value in fields.items():
+        if name not in allowed:
+            raise ValueError(f"{cls.__name__} has no field {name!r}")
+        setattr(node, name, value)
+    return node
+
+def dumps(program):
+    return json.dumps(program, default=encode_node, separators=(',', ':')).encode('utf-8')
+
+def loads(data):
+    return json.loads(data, object_hook=decode_node)
+
+def source_key(source):
+    digest = hashlib.sha256()
+    digest.update(f'{__version__}:{CACHE_FORMAT}\n'.encode('utf-8'))
+    digest.update(source.encode('utf-8'))
+    return digest.hexdigest()
+
+def parse_source(source):
+    return optimize(Parser(Tokenizer(source).iter_tokens()).parse())
+
+class ProgramCache:
+    # Stores parsed, optimized programs next to the script, like __pycache__:
+    #   examples/__bhaicache__/fibonacci.bhai.bhaic
+    # Each entry records the hash of the source and interpreter version it
+    # was built from; anything that doesn't match is treated as a miss.
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def cache_dir(self, filename):
+        if self.directory is not None:
+            return self.directory
+        return os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR)
+
+    def cache_path(self, filename):
+        name = os.path.basename(filename)
+        if self.directory is not None:
+            # One shared directory for scripts from many places
+            where = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()[:12]
+            name = f'{name}.{where}'
+        return os.path.join(self.cache_dir(filename), name + CACHE_SUFFIX)
+
+    def load(self, filename, key):
+        try:
+            with open(self.cache_path(filename), 'rb') as f:
+                if f.readline() != MAGIC:
+                    return None
+                if f.readline().decode('ascii').strip() != key:
+                    return None
+                program = loads(f.read())
+            return program if isinstance(program, ASTNode) else None
+        except Exception:
+            # Missing, truncated or written by an incompatible version
+            return None
+
+    def store(self, filename, key, program):
+        directory = self.cache_dir(filename)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError:
+            return False
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC)
+                f.write(key.encode('ascii') + b'\n')
+                f.write(dumps(program))
+            # Readers see either the old entry or the complete new one
+            os.replace(temp_path, self.cache_path(filename))
+            return True
+        except (OSError, TypeError, ValueError, RecursionError):
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+
+    def parse_file(self, filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            source = f.read()
+        return self.parse(filename, source)
+
+    def parse(self, filename, source):
+        # parse_file for a source that has already been read
+        key = source_key(source)
+        program = self.load(filename, key)
+        if program is None:
+            program = parse_source(source)
+            self.store(filename, key, program)
+        return program
+
+    def clear(self, path='.'):
+        if self.directory is not None:
+            directory = self.directory
+        elif os.path.isdir(path):
+            directory = os.path.join(path, CACHE_DIR)
+        else:
+            directory = self.cache_dir(path)
+
+        if not os.path.isdir(directory):
+            return False
+        shutil.rmtree(directory, ignore_errors=True)
+        return True
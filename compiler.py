@@ -0,0 +1,317 @@
+from parser import *
+from tokenizer import TokenType
+
+class Op:
+    LOAD_CONST = 0
+    LOAD_GLOBAL = 1
+    STORE_GLOBAL = 2
+    LOAD_FAST = 22
+    STORE_FAST = 23
+    POP_TOP = 3
+    BINARY_ADD = 4
+    BINARY_SUB = 5
+    BINARY_MUL = 6
+    BINARY_DIV = 7
+    COMPARE_EQ = 8
+    COMPARE_GT = 9
+    COMPARE_LT = 10
+    UNARY_NEG = 11
+    JUMP = 12
+    JUMP_IF_FALSE = 13
+    PRINT = 14
+    BUILD_LIST = 15
+    MAKE_FUNCTION = 16
+    LOAD_FUNCTION = 17
+    CALL = 18
+    CALL_BUILTIN = 19
+    RETURN_VALUE = 20
+    HALT = 21
+    GET_ITER = 24
+    FOR_ITER = 25
+    JUMP_BACK = 26
+    INDEX = 27
+    SLICE = 28
+    STORE_INDEX = 29
+    TAIL_CALL = 30
+
+OPNAMES = sorted((value, name) for name, value in vars(Op).items() if not name.startswith('_'))
+OPNAMES = [name for value, name in OPNAMES]
+
+BINARY_OPS = {
+    TokenType.PLUS: Op.BINARY_ADD,
+    TokenType.MINUS: Op.BINARY_SUB,
+    TokenType.MULTIPLY: Op.BINARY_MUL,
+    TokenType.DIVIDE: Op.BINARY_DIV,
+    TokenType.BARABAR: Op.COMPARE_EQ,
+    TokenType.BADA: Op.COMPARE_GT,
+    TokenType.CHOTA: Op.COMPARE_LT,
+}
+
+class CodeObject:
+    def __init__(self, name, params=(), param_slots=(), local_names=(),
+                 memoize=False, memo_size=None):
+        self.name = name
+        self.params = list(params)
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.param_slots = list(param_slots)
+        self.local_names = list(local_names)
+        self.nlocals = len(self.local_names)
+        self.code = []
+        self.consts = []
+        self.const_index = {}
+        self.loaded = {}
+
+    def __repr__(self):
+        return f"CodeObject({self.name}, {len(self.code) // 2} instructions)"
+
+    def disassemble(self):
+        lines = []
+        for pc in range(0, len(self.code), 2):
+            lines.append(f"{pc:4d} {OPNAMES[self.code[pc]]:<14} {self.code[pc + 1]}")
+        return "\n".join(lines)
+
+class Compiler:
+    # Control flow is plain jumps: bas_kar jumps past the innermost loop,
+    # aage_badh back to its start, and wapas returns from the code object
+    # (a top-level wapas ends the program). The parser guarantees bas_kar
+    # and aage_badh only appear inside a loop. Inside a kaam, wapas f(...)
+    # is a TAIL_CALL followed by a RETURN_VALUE the VM only reaches when
+    # it had to make an ordinary call instead.
+
+    def __init__(self):
+        self.code = None
+        self.break_patches = None
+        self.continue_target = None
+        self.in_function = False
+
+    def error(self, msg):
+        raise RuntimeError(f"❌ Runtime Error: {msg}\n"
+                          f"Bhai, pagal ho gaya hai apna code! 🤦‍♂️")
+
+    def compile_program(self, program):
+        self.code = CodeObject('<program>')
+        self.compile_block(program.statements)
+        self.emit(Op.HALT)
+        return self.code
+
+    def compile_function(self, node):
+        saved = self.code, self.break_patches, self.continue_target, self.in_function
+        self.code = CodeObject(node.name, node.params, node.param_slots, node.local_names,
+                               node.memoize, node.memo_size)
+        self.break_patches = self.continue_target = None
+        self.in_function = True
+        self.compile_block(node.body)
+        self.emit(Op.LOAD_CONST, self.const(None))
+        self.emit(Op.RETURN_VALUE)
+        code = self.code
+        self.code, self.break_patches, self.continue_target, self.in_function = saved
+        return code
+
+    # -- emit helpers --
+
+    def emit(self, op, arg=0):
+        self.code.code.append(op)
+        self.code.code.append(arg)
+        return len(self.code.code) - 1
+
+    def here(self):
+        return len(self.code.code)
+
+    def patch(self, positions, target=None):
+        if target is None:
+            target = self.here()
+        for pos in positions:
+            self.code.code[pos] = target
+
+    def const(self, value):
+        consts = self.code.consts
+        if isinstance(value, CodeObject):
+            consts.append(value)
+            return len(consts) - 1
+
+        # repr keeps 1, 1.0 and -0.0 apart
+        key = (type(value), repr(value))
+        index = self.code.const_index.get(key)
+        if index is None:
+            index = self.code.const_index[key] = len(consts)
+            consts.append(value)
+        return index
+
+    # -- statements --
+
+    def compile_block(self, statements):
+        for stmt in statements:
+            self.compile_statement(stmt)
+
+    def compile_statement(self, node):
+        method = self.statement_compilers.get(type(node))
+        if method is None:
+            self.compile_expression(node)
+            self.emit(Op.POP_TOP)
+        else:
+            method(self, node)
+
+    def compile_assignment(self, node):
+        self.compile_expression(node.value)
+        self.emit(Op.STORE_FAST if node.local else Op.STORE_GLOBAL, node.slot)
+
+    def compile_bol(self, node):
+        self.compile_expression(node.expression)
+        self.emit(Op.PRINT)
+
+    def compile_if(self, node):
+        self.compile_expression(node.condition)
+        jump_else = self.emit(Op.JUMP_IF_FALSE)
+        self.compile_block(node.then_block)
+        if node.else_block:
+            jump_end = self.emit(Op.JUMP)
+            self.patch([jump_else])
+            self.compile_block(node.else_block)
+            self.patch([jump_end])
+        else:
+            self.patch([jump_else])
+
+    def compile_while(self, node):
+        saved = self.break_patches, self.continue_target
+        self.break_patches = []
+        start = self.continue_target = self.here()
+        self.compile_expression(node.condition)
+        jump_end = self.emit(Op.JUMP_IF_FALSE)
+        self.compile_block(node.body)
+        self.emit(Op.JUMP_BACK, start)
+        self.patch([jump_end] + self.break_patches)
+        self.break_patches, self.continue_target = saved
+
+    def compile_for(self, node):
+        # The iterator lives on the stack for the whole loop. FOR_ITER pops
+        # it when exhausted; bas_kar jumps to a POP_TOP that drops it.
+        self.compile_expression(node.iterable)
+        self.emit(Op.GET_ITER)
+
+        saved = self.break_patches, self.continue_target
+        self.break_patches = []
+        start = self.continue_target = self.here()
+        jump_end = self.emit(Op.FOR_ITER)
+        self.emit(Op.STORE_FAST if node.local else Op.STORE_GLOBAL, node.slot)
+        self.compile_block(node.body)
+        self.emit(Op.JUMP_BACK, start)
+        self.patch(self.break_patches)
+        self.emit(Op.POP_TOP)
+        self.patch([jump_end])
+        self.break_patches, self.continue_target = saved
+
+    def compile_function_def(self, node):
+        self.emit(Op.MAKE_FUNCTION, self.const(self.compile_function(node)))
+
+    def compile_return(self, node):
+        value = node.value
+        if self.in_function and value.__class__ is FunctionCall and value.builtin is None:
+            self.compile_call(value, Op.TAIL_CALL)
+        else:
+            self.compile_expression(value)
+        self.emit(Op.RETURN_VALUE)
+
+    def compile_break(self, node):
+        self.break_patches.append(self.emit(Op.JUMP))
+
+    def compile_continue(self, node):
+        self.emit(Op.JUMP_BACK, self.continue_target)
+
+    def compile_index_assignment(self, node):
+        # STORE_INDEX's operand is the global slot a yaad_rakh kaam may not
+        # change, or -1
+        self.compile_expression(node.target)
+        self.compile_expression(node.index)
+        self.compile_expression(node.value)
+        self.emit(Op.STORE_INDEX, -1 if node.slot is None else node.slot)
+
+    statement_compilers = {
+        BhaiStatement: compile_assignment,
+        Assignment: compile_assignment,
+        BolStatement: compile_bol,
+        IfStatement: compile_if,
+        WhileLoop: compile_while,
+        ForEachLoop: compile_for,
+        FunctionDef: compile_function_def,
+        Return: compile_return,
+        Break: compile_break,
+        Continue: compile_continue,
+        IndexAssignment: compile_index_assignment,
+    }
+
+    # -- expressions --
+
+    def compile_expression(self, node):
+        method = self.expression_compilers.get(type(node))
+        if method is None:
+            self.error(f"Cannot evaluate: {type(node)}")
+        method(self, node)
+
+    def compile_literal(self, node):
+        self.emit(Op.LOAD_CONST, self.const(node.value))
+
+    def compile_identifier(self, node):
+        self.emit(Op.LOAD_FAST if node.local else Op.LOAD_GLOBAL, node.slot)
+
+    def compile_binary(self, node):
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        op = BINARY_OPS.get(node.op.type)
+        if op is None:
+            self.error(f"Unknown operator: {node.op.type}")
+        self.emit(op)
+
+    def compile_unary(self, node):
+        self.compile_expression(node.operand)
+        if node.op.type == TokenType.MINUS:
+            self.emit(Op.UNARY_NEG)
+        else:
+            self.emit(Op.POP_TOP)
+            self.emit(Op.LOAD_CONST, self.const(None))
+
+    def compile_call(self, node, op=Op.CALL):
+        if node.builtin is not None:
+            for arg in node.args:
+                self.compile_expression(arg)
+            self.emit(Op.CALL_BUILTIN, self.const((node.builtin, len(node.args))))
+            return
+
+        self.emit(Op.LOAD_FUNCTION, self.const((node.name, len(node.args))))
+        for arg in node.args:
+            self.compile_expression(arg)
+        self.emit(op, len(node.args))
+
+    def compile_list(self, node):
+        for elem in node.elements:
+            self.compile_expression(elem)
+        self.emit(Op.BUILD_LIST, len(node.elements))
+
+    def compile_index(self, node):
+        self.compile_expression(node.target)
+        self.compile_expression(node.index)
+        self.emit(Op.INDEX)
+
+    def compile_slice(self, node):
+        self.compile_expression(node.target)
+        for bound in (node.start, node.stop):
+            if bound is None:
+                self.emit(Op.LOAD_CONST, self.const(None))
+            else:
+                self.compile_expression(bound)
+        self.emit(Op.SLICE)
+
+    expression_compilers = {
+        Number: compile_literal,
+        String: compile_literal,
+        Identifier: compile_identifier,
+        BinaryOp: compile_binary,
+        UnaryOp: compile_unary,
+        FunctionCall: compile_call,
+        ListLiteral: compile_list,
+        Index: compile_index,
+        Slice: compile_slice,
+    }
+
+def compile_program(program):
+    return Compiler().compile_program(program)
@@ -0,0 +1,76 @@
+from tokenizer import Tokenizer
+from parser import Parser
+from optimizer import optimize
+from interpreter import BhaiInterpreter
+from resolver import UNSET
+from vm import BhaiVM
+from output import BufferedOutput
+from values import plain, bhai_value
+
+ENGINES = {
+    'vm': BhaiVM,
+    'tree': BhaiInterpreter,
+}
+
+class BhaiProgram:
+    # A program that has been parsed, optimized, resolved and (for the VM)
+    # compiled once. run() only creates a fresh interpreter and globals, so
+    # one BhaiProgram can be run any number of times, from any thread.
+    #
+    #     rule = bhai.compile('wapas score bada 50;')
+    #     rule.run(globals={'score': 72})   # -> 1
+    #
+    # max_steps, max_seconds and max_size apply to every run; going over
+    # one raises interpreter.BudgetExceeded. vector=True makes + - * / on
+    # number lists work element by element.
+
+    def __init__(self, source, engine='vm', max_depth=1000,
+                 max_steps=None, max_seconds=None, max_size=None, ast=None, vector=False):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.source = source
+        self.engine = engine
+        self.engine_class = ENGINES[engine]
+        self.max_depth = max_depth
+        self.limits = {'max_steps': max_steps, 'max_seconds': max_seconds, 'max_size': max_size,
+                       'vector': vector}
+
+        if ast is None:
+            ast = optimize(Parser(Tokenizer(source).iter_tokens()).parse())
+        interpreter = self.engine_class(max_depth=max_depth, output=BufferedOutput(policy='program'))
+        self.prepared = interpreter.prepare(ast)
+        self.symbols = interpreter.symbols
+        self.empty_globals = [UNSET] * len(self.symbols)
+
+    @property
+    def names(self):
+        return list(self.symbols.names)
+
+    def sink(self, output):
+        if output is None:
+            return BufferedOutput(policy='program')
+        if isinstance(output, BufferedOutput):
+            return output
+        # Any text stream: io.StringIO, a file, sys.stderr...
+        return BufferedOutput(output, policy='program')
+
+    def run(self, globals=None, output=None):
+        # Returns the value of a top-level `wapas` as plain Python data
+        # (list, str, int, float), or None. Lists in `globals` are copied
+        # in, and names the program never mentions are ignored.
+        interpreter = self.engine_class(max_depth=self.max_depth, output=self.sink(output),
+                                        **self.limits)
+        interpreter.symbols = self.symbols
+        values = self.empty_globals[:]
+        if globals:
+            index = self.symbols.index
+            for name, value in globals.items():
+                slot = index.get(name)
+                if slot is not None:
+                    values[slot] = bhai_value(value)
+        interpreter.globals = values
+        return plain(interpreter.run_program(self.prepared))
+
+def compile(source, engine='vm', max_depth=1000, max_steps=None, max_seconds=None, max_size=None,
+            vector=False):
+    return BhaiProgram(source, engine, max_depth, max_steps, max_seconds, max_size, vector=vector)
@@ -0,0 +1,299 @@
+import re
+from bisect import bisect_left, bisect_right
+from tokenizer import Tokenizer, TokenType
+from parser import Parser, Program, ASTNode
+
+OPENERS = {TokenType.LPAREN, TokenType.LBRACE, TokenType.LBRACKET}
+CLOSERS = {TokenType.RPAREN, TokenType.RBRACE, TokenType.RBRACKET}
+
+ERROR_POSITION = re.compile(r'Line (\d+)(?:, Column (\d+))?: ')
+
+class Diagnostic:
+    __slots__ = ('line', 'column', 'message')
+
+    def __init__(self, line, column, message):
+        self.line = line
+        self.column = column
+        self.message = message
+
+    def __repr__(self):
+        return f"Diagnostic({self.line}:{self.column}, {self.message.splitlines()[0]!r})"
+
+class Chunk:
+    # One top-level statement: the offset, line and column of its first
+    # token, and what it parsed to (None plus a diagnostic if it didn't).
+    # `shift` is how many lines the statement has moved since its nodes
+    # last had their line numbers updated.
+    __slots__ = ('start', 'line', 'column', 'node', 'diagnostic', 'shift')
+
+    def __init__(self, start, line, column, node, diagnostic=None):
+        self.start = start
+        self.line = line
+        self.column = column
+        self.node = node
+        self.diagnostic = diagnostic
+        self.shift = 0
+
+def chunk_start(chunk):
+    return chunk.start
+
+def diagnose(error):
+    # The position moves to line/column; the message keeps the rest, so it
+    # stays right when the statement is later moved by an edit above it
+    message = str(error)
+    match = ERROR_POSITION.match(message)
+    if match is None:
+        return Diagnostic(None, None, message)
+    column = match.group(2)
+    return Diagnostic(int(match.group(1)), int(column) if column else None, message[match.end():])
+
+CHILD_SLOTS = {}
+
+def child_slots(cls):
+    names = CHILD_SLOTS.get(cls)
+    if names is None:
+        names = CHILD_SLOTS[cls] = tuple(name for klass in cls.__mro__
+                                         for name in getattr(klass, '__slots__', ())
+                                         if name != 'line' and name != 'column')
+    return names
+
+def unfinished(source):
+    # True while a bracket is still open, so the REPL should keep reading
+    depth = 0
+    try:
+        for token in Tokenizer(source).iter_tokens():
+            if token.type in OPENERS:
+                depth += 1
+            elif token.type in CLOSERS:
+                depth -= 1
+    except SyntaxError:
+        # Let the parser report it
+        return False
+    return depth > 0
+
+def shift_lines(node, delta):
+    # Moves a reused subtree up or down by `delta` lines
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, ASTNode):
+            try:
+                item.line += delta
+            except AttributeError:
+                pass
+            for name in child_slots(type(item)):
+                stack.append(getattr(item, name, None))
+
+def move(chunk, offset, lines):
+    chunk.start += offset
+    chunk.line += lines
+    chunk.shift += lines
+
+class Document:
+    # A source buffer for editors and the REPL. Each edit re-tokenizes and
+    # re-parses from the top-level statement before the edit until the
+    # parser starts a statement exactly where an old one started, on a
+    # line after the edit. The old statements from there on are reused.
+    #
+    #     doc = Document(source)
+    #     diagnostics = doc.edit(start, end, 'new text')
+    #     program = doc.program
+    #
+    # Offsets are character offsets into the text. The first syntax error
+    # in a statement is reported as a diagnostic and parsing picks up again
+    # at the next unchanged statement, so one typo doesn't hide the rest.
+    #
+    # Reused statements after an edit aren't touched either. Chunks from
+    # index `pivot` on store their offset and line less `moved`, the total
+    # the edits before them added, like the gap in a gap buffer: an edit
+    # adds to `moved` and only walks the chunks between the last edit and
+    # this one. The line numbers inside each AST are brought up to date
+    # when `program` is next read, so typing a newline costs the same
+    # anywhere in the file. Diagnostics are kept by chunk index and move
+    # with the edit, which costs one step per syntax error. The text itself
+    # is one string, so each edit does copy that, but only as a memcpy.
+
+    def __init__(self, text=''):
+        self.text = ''
+        self.chunk_list = []
+        self.pivot = 0
+        self.moved = (0, 0)
+        # Indexes of the chunks that failed to parse, in order
+        self.failed = []
+        self.built = None
+        self.diagnostics = []
+        # Statements parsed and reused by the last edit
+        self.reparsed = 0
+        self.reused = 0
+        self.edit(0, 0, text)
+
+    def replace(self, text):
+        return self.edit(0, len(self.text), text)
+
+    @property
+    def broken(self):
+        # Index of the first chunk that failed to parse
+        return self.failed[0] if self.failed else len(self.chunk_list)
+
+    @property
+    def chunks(self):
+        # Every chunk at its real offset and line
+        self.settle(len(self.chunk_list))
+        return self.chunk_list
+
+    @property
+    def program(self):
+        if self.built is None:
+            chunks = self.chunks
+            for chunk in chunks:
+                if chunk.shift:
+                    if chunk.node is not None:
+                        shift_lines(chunk.node, chunk.shift)
+                    chunk.shift = 0
+            program = Program([chunk.node for chunk in chunks if chunk.node is not None])
+            program.line, program.column = (chunks[0].line, chunks[0].column) if chunks else (1, 1)
+            self.built = program
+        return self.built
+
+    def settle(self, index):
+        # Moves the pivot to `index`, applying or taking back `moved` for
+        # the chunks it passes over
+        offset, lines = self.moved
+        chunks, pivot = self.chunk_list, self.pivot
+        if offset or lines:
+            if index > pivot:
+                for chunk in chunks[pivot:index]:
+                    move(chunk, offset, lines)
+            else:
+                for chunk in chunks[index:pivot]:
+                    move(chunk, -offset, -lines)
+        self.pivot = index
+        if index == len(chunks):
+            self.moved = (0, 0)
+
+    def find(self, offset, search):
+        # bisect_left or bisect_right over the chunks' real offsets
+        chunks, pivot = self.chunk_list, self.pivot
+        index = search(chunks, offset, 0, pivot, key=chunk_start)
+        if index < pivot:
+            return index
+        return search(chunks, offset - self.moved[0], pivot, len(chunks), key=chunk_start)
+
+    def start_of(self, index):
+        start = self.chunk_list[index].start
+        return start + self.moved[0] if index >= self.pivot else start
+
+    def line_of(self, index):
+        line = self.chunk_list[index].line
+        return line + self.moved[1] if index >= self.pivot else line
+
+    def edit(self, start, end, text):
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit {start}:{end} is outside the document (length {len(self.text)})")
+        old_chunks = self.chunk_list
+        source = self.text[:start] + text + self.text[end:]
+        delta = len(text) - (end - start)
+        line_delta = text.count('\n') - self.text.count('\n', start, end)
+
+        # The chunk holding the edit and the one before it, since the parser
+        # may have looked at the edited text to finish the previous statement.
+        # A statement that failed to parse is always parsed again, since an
+        # edit further down (a closing brace, say) may be what fixes it.
+        first = min(max(self.find(start, bisect_right) - 2, 0), self.broken)
+        if first == 0:
+            pos, line, column = 0, 1, 1
+        else:
+            pos, line, column = self.start_of(first), self.line_of(first), old_chunks[first].column
+        chunks = []
+
+        # Old statements starting after the edit are candidates for reuse
+        candidate = self.find(end, bisect_left)
+        candidate = max(candidate, first)
+        reuse = len(old_chunks)
+        edit_end = start + len(text)
+        edit_line = line + source.count('\n', pos, edit_end)
+
+        # Offsets of tokens, found by walking lines forward from `pos`
+        line_number = line
+        line_start = pos - column + 1
+
+        def offset(line, column):
+            nonlocal line_number, line_start
+            while line_number < line:
+                line_start = source.index('\n', line_start) + 1
+                line_number += 1
+            return line_start + column - 1
+
+        tokenizer = Tokenizer(source)
+        tokenizer.pos, tokenizer.line, tokenizer.column = pos, line, column
+        token = None
+        try:
+            parser = Parser(tokenizer.iter_tokens())
+            while True:
+                parser.skip_newlines()
+                token = parser.current_token()
+                if token.type == TokenType.EOF:
+                    break
+                at = offset(token.line, token.column)
+                if at >= edit_end and token.line > edit_line:
+                    while candidate < len(old_chunks) and self.start_of(candidate) + delta < at:
+                        candidate += 1
+                    if candidate < len(old_chunks) and self.start_of(candidate) + delta == at:
+                        reuse = candidate
+                        break
+                chunks.append(Chunk(at, token.line, token.column, parser.parse_statement()))
+                token = None
+        except SyntaxError as error:
+            diagnostic = diagnose(error)
+            if token is not None:
+                at, line, column = offset(token.line, token.column), token.line, token.column
+            elif diagnostic.line is not None and diagnostic.line >= line:
+                # The tokenizer failed between statements
+                line, column = diagnostic.line, diagnostic.column or 1
+                at = min(offset(line, column), len(source))
+            else:
+                at = pos
+            chunks.append(Chunk(at, line, column, None, diagnostic))
+            # Carry on with the first old statement after the broken one
+            while candidate < len(old_chunks):
+                chunk_at = self.start_of(candidate)
+                if (chunk_at >= end and chunk_at + delta > at
+                        and self.line_of(candidate) + line_delta > edit_line):
+                    break
+                candidate += 1
+            reuse = candidate
+
+        # Every failed chunk is at or after `first`, so the ones replaced
+        # here come first in the list and the rest are all in the tail
+        replaced = 0
+        while replaced < len(self.failed) and self.failed[replaced] < reuse:
+            replaced += 1
+        kept = self.failed[replaced:]
+        if line_delta:
+            for index in kept:
+                diagnostic = old_chunks[index].diagnostic
+                if diagnostic.line is not None:
+                    diagnostic.line += line_delta
+
+        # The new chunks go in at their real positions, just before the
+        # pivot; the reused tail after it moves by this edit through `moved`
+        self.settle(first)
+        old_chunks[first:reuse] = chunks
+        self.pivot = first + len(chunks)
+        if self.pivot == len(old_chunks):
+            self.moved = (0, 0)
+        else:
+            offset_moved, lines_moved = self.moved
+            self.moved = (offset_moved + delta, lines_moved + line_delta)
+
+        growth = first + len(chunks) - reuse
+        self.failed = ([first + index for index, chunk in enumerate(chunks) if chunk.diagnostic is not None]
+                       + [index + growth for index in kept])
+        self.text = source
+        self.reparsed = len(chunks)
+        self.reused = len(self.chunk_list) - len(chunks)
+        self.built = None
+        self.diagnostics = [self.chunk_list[index].diagnostic for index in self.failed]
+        return self.diagnostics
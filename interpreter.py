@@ -1,36 +1,430 @@
+import sys
+import threading
+import time
 from parser import *
 from tokenizer import TokenType
+from resolver import UNSET, Resolver, SymbolTable
+from values import BhaiRange, BhaiList, Rope, make_list, text
+from stdlib import SEQUENCES
+from vector import VECTORS, elementwise
+from output import BufferedOutput
+from memo import MISSING, MemoCache, ReadOnlyGlobals, memo_key
+
+__version__ = "0.1.0"
+
+# Steps are counted down in chunks: the hot path is one subtraction and a
+# compare, and the step limit and the clock are only looked at per chunk.
+CHECK_EVERY = 1000
+
+# Python frames one kaam call can take in the tree-walker (a call inside an
+# agar inside a loop...), used to size the recursion limit for max_depth
+FRAMES_PER_CALL = 12
+
+RECURSION_LOCK = threading.Lock()
+
+def make_room(max_depth):
+    # The recursion limit is process-wide and lowering it while another
+    # thread is deep in a call is fatal, so it is only ever raised, once
+    # per larger max_depth, and never put back
+    needed = max_depth * FRAMES_PER_CALL + 200
+    if needed > sys.getrecursionlimit():
+        with RECURSION_LOCK:
+            if needed > sys.getrecursionlimit():
+                sys.setrecursionlimit(needed)
+
+# Operand types the arithmetic fast paths accept (not bool, not subclasses)
+NUMBERS = frozenset((int, float))
+
+# Left operands add_strings takes: a short str is added directly, a long
+# one or a Rope goes through concat
+TEXT = frozenset((str, Rope))
+
+# A + on strings whose left side is at least this long builds a Rope
+# instead of copying both sides
+ROPE_MIN = 256
+
+class Frame:
+    __slots__ = ('function', 'locals')
+
+    def __init__(self, function, locals):
+        self.function = function
+        self.locals = locals
+
+    @property
+    def name(self):
+        return self.function.name
+
+class ControlFlow(Exception):
+    # bas_kar, aage_badh and wapas unwind to the loop or call that handles
+    # them, so ordinary statements don't check what the last one returned.
+    pass
+
+class BreakSignal(ControlFlow):
+    pass
+
+class ContinueSignal(ControlFlow):
+    pass
+
+class ReturnSignal(ControlFlow):
+    def __init__(self, value):
+        self.value = value
+
+class TailCall(ControlFlow):
+    # wapas f(...) inside a kaam: call_function runs f in place of the
+    # current call instead of nesting it
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+
+# Break and continue carry nothing, so one instance of each is reused.
+# with_traceback(None) stops tracebacks piling up across raises.
+BREAK = BreakSignal()
+CONTINUE = ContinueSignal()
+
+class BudgetExceeded(RuntimeError):
+    # A run went over max_steps, max_seconds or max_size. kind says which:
+    # 'steps', 'time' or 'size'.
+    def __init__(self, message, kind):
+        super().__init__(message)
+        self.kind = kind
 
 class BhaiInterpreter:
-    def __init__(self):
-        self.variables = {}
+    def __init__(self, max_depth=1000, output=None, memo_size=1024,
+                 max_steps=None, max_seconds=None, max_size=None, vector=False):
+        self.output = output if output is not None else BufferedOutput()
+        self.memo_size = memo_size
+        self.memo_tables = {}
+        self.symbols = SymbolTable()
+        self.globals = []
         self.functions = {}
+        self.frames = []
+        self.locals = None
+        self.max_depth = max_depth
+        # A step is one loop iteration or one kaam call
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_size = max_size
+        self.size_limit = max_size if max_size is not None else sys.maxsize
+        # + - * / on number lists work element by element
+        self.vector = vector
+        self.start_budget()
+
+    @property
+    def variables(self):
+        return {name: text(value) for name, value in zip(self.symbols.names, self.globals)
+                if value is not UNSET}
     
     def error(self, msg):
         raise RuntimeError(f"❌ Runtime Error: {msg}\n"
                           f"Bhai, pagal ho gaya hai apna code! 🤦‍♂️")
+
+    def undefined_variable(self, name):
+        self.error(f'Variable "{name}" ko pehle define karo bhai! '
+                  f'Ye kya undefined variable use kar rahe ho? 📚')
+
+    def too_deep(self):
+        self.error(f'Itni gehri recursion? {self.max_depth} calls se aage nahi jaa sakte! '
+                  f'Base case bhool gaye kya? 🌀')
+
+    def over_budget(self, kind, msg):
+        raise BudgetExceeded(f"❌ Budget Error: {msg}\n"
+                             f"Bhai, thoda haath rok ke! 🛑", kind)
+
+    def start_budget(self):
+        self.steps = 0
+        self.deadline = None
+        if self.max_seconds is not None:
+            self.deadline = time.monotonic() + self.max_seconds
+        self.next_chunk()
+
+    def next_chunk(self):
+        chunk = CHECK_EVERY
+        if self.max_steps is not None:
+            chunk = min(chunk, self.max_steps + 1 - self.steps)
+        self.chunk = self.countdown = chunk
+
+    def checkpoint(self):
+        # Called when countdown reaches zero
+        self.steps += self.chunk
+        if self.max_steps is not None and self.steps > self.max_steps:
+            self.over_budget('steps', f'{self.max_steps} steps ka budget khatam! '
+                                      f'Kahin infinite loop toh nahi likh diya? 🔁')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.out_of_time()
+        self.next_chunk()
+
+    def out_of_time(self):
+        self.over_budget('time', f'{self.max_seconds} second ka time budget khatam! '
+                                 f'Code thoda tez karo bhai ⏰')
+
+    @property
+    def steps_used(self):
+        return self.steps + self.chunk - self.countdown
+
+    def check_size(self, value):
+        if len(value) > self.size_limit:
+            self.over_budget('size', f'{len(value)} items ki list/string? '
+                                     f'Limit {self.max_size} hai bhai! 🐘')
+        return value
+
+    def render(self, value, used=0):
+        # str(value), the text bol prints, built piece by piece so that
+        # max_size and max_seconds hold while it is built: a list whose
+        # elements are shared ([a, a] again and again) has text far longer
+        # than anything it stores. `used` is text already built alongside
+        # it, for format and join.
+        cls = value.__class__
+        if cls is not BhaiList and cls is not BhaiRange:
+            result = str(value)
+            if used + len(result) > self.size_limit:
+                self.text_too_long(used + len(result))
+            return result
+
+        limit, deadline = self.size_limit, self.deadline
+        parts = []
+        size = used
+        # Storage lists being written out, so a list inside itself is [...]
+        # like Python prints it
+        active = set()
+
+        def add(piece):
+            nonlocal size
+            size += len(piece)
+            if size > limit:
+                self.text_too_long(size)
+            parts.append(piece)
+            if deadline is not None and not len(parts) % CHECK_EVERY and time.monotonic() > deadline:
+                self.out_of_time()
+
+        def walk(item):
+            cls = item.__class__
+            if cls is BhaiRange:
+                elements = item.range
+            elif cls is BhaiList:
+                elements = item.items
+            else:
+                add(repr(item))
+                return
+            if id(elements) in active:
+                add('[...]')
+                return
+            active.add(id(elements))
+            add('[')
+            for index, element in enumerate(elements):
+                if index:
+                    add(', ')
+                walk(element)
+            add(']')
+            active.discard(id(elements))
+
+        walk(value)
+        return ''.join(parts)
+
+    def text_too_long(self, size):
+        self.over_budget('size', f'{size} se zyada characters ka text? '
+                                 f'Limit {self.max_size} hai bhai! 🐘')
+
+    def concat(self, left, right):
+        # + on strings and lists is where values grow, so max_size is
+        # checked here. A range is checked before it becomes a list or string.
+        if left.__class__ is str and right.__class__ is str:
+            if len(left) < ROPE_MIN:
+                result = left + right
+            else:
+                result = Rope([left, right], len(left) + len(right))
+        else:
+            if isinstance(left, BhaiRange):
+                self.check_size(left)
+            if isinstance(right, BhaiRange):
+                self.check_size(right)
+            if left.__class__ is Rope:
+                result = left.append(right if right.__class__ is str else str(right))
+            elif isinstance(left, (str, Rope)) or isinstance(right, (str, Rope)):
+                result = str(left) + str(right)
+            else:
+                result = left + right
+        if len(result) > self.size_limit:
+            self.check_size(result)
+        return result
+
+    def vectorize(self, op, left, right):
+        # The vector mode result of left op right, or None if it doesn't apply
+        if left.__class__ in VECTORS or right.__class__ in VECTORS:
+            return elementwise(self, op, left, right)
+        return None
+
+    def resolve(self, program):
+        Resolver(self.symbols, self.functions).resolve(program)
+        missing = len(self.symbols) - len(self.globals)
+        if missing > 0:
+            self.globals.extend([UNSET] * missing)
+
+    def reset_frames(self):
+        del self.frames[:]
+        self.locals = None
+
+    def call_function(self, func, args, memo=True):
+        if memo and func.memoize:
+            return self.call_memoized(func, args)
+
+        saved = self.locals
+        self.locals = self.enter(func, args)
+        try:
+            while True:
+                try:
+                    return self.run_function(func)
+                except TailCall as call:
+                    # wapas g(...) ends this call; g runs in its frame
+                    func = call.function
+                    self.countdown -= 1
+                    if not self.countdown:
+                        self.checkpoint()
+                    self.locals = self.make_locals(func, call.args)
+                    self.frames[-1] = Frame(func, self.locals)
+        finally:
+            self.locals = saved
+            self.frames.pop()
+
+    def enter(self, func, args):
+        # Counts the step, checks the depth and pushes the kaam's frame
+        self.countdown -= 1
+        if not self.countdown:
+            self.checkpoint()
+        if len(self.frames) >= self.max_depth:
+            self.too_deep()
+        locals = self.make_locals(func, args)
+        self.frames.append(Frame(func, locals))
+        return locals
+
+    def make_locals(self, func, args):
+        locals = [UNSET] * func.nlocals
+        for slot, value in zip(func.param_slots, args):
+            locals[slot] = value
+        return locals
+
+    def call_builtin(self, builtin, args):
+        if not builtin.min_args <= len(args) <= builtin.max_args:
+            self.error(f'{builtin.name} ko {builtin.arity()} arguments chahiye, '
+                      f'tumne {len(args)} diye! Count toh sahi karo! 🔢')
+        return builtin.function(self, *args)
+
+    def tail_call(self, node):
+        # The TailCall for `wapas f(...)` in a kaam, or None if the call has
+        # to nest: builtins, yaad_rakh on either side, errors to report
+        if not self.frames or node.builtin is not None:
+            return None
+        func = self.functions.get(node.name)
+        if (func is None or func.memoize or self.frames[-1].function.memoize
+                or len(node.args) != len(func.params)):
+            return None
+        return TailCall(func, [self.evaluate(arg) for arg in node.args])
+
+    def memo_table(self, func):
+        table = self.memo_tables.get(func)
+        if table is None:
+            table = self.memo_tables[func] = MemoCache(func.name, func.memo_size or self.memo_size)
+        return table
+
+    def call_memoized(self, func, args):
+        table = self.memo_table(func)
+
+        key = memo_key(args)
+        result = table.get(key)
+        if result is not MISSING:
+            return result
+
+        if isinstance(self.globals, ReadOnlyGlobals):
+            result = self.call_function(func, args, False)
+        else:
+            saved = self.globals
+            self.globals = ReadOnlyGlobals(saved, self, func)
+            try:
+                result = self.call_function(func, args, False)
+            finally:
+                self.globals = saved
+        table.put(key, result)
+        return result
+
+    def memo_info(self):
+        return {table.name: table.info() for table in self.memo_tables.values()}
+
+    def impure_memo(self, func, slot):
+        self.error(f'yaad_rakh kaam "{func.name}" global variable "{self.symbols.names[slot]}" '
+                  f'ko badal raha hai! Yaad rakhne wale kaam pure hone chahiye 🧠')
+
+    def pure_store(self, slot, target):
+        # xs[i] = v inside a yaad_rakh call. `slot` is the global the target
+        # was reached through by name; a local that is just another name
+        # for a global list is caught by identity. A list nested inside a
+        # global list and reached through a local isn't tracked.
+        globals = self.globals
+        if slot is None:
+            for slot, value in enumerate(globals.values):
+                if value is target:
+                    break
+            else:
+                return
+        self.impure_memo(globals.function, slot)
+
+    def prepare(self, program):
+        # Everything that only depends on the source; run_program can then
+        # be called again and again with fresh globals
+        self.resolve(program)
+        return program
+
+    def run_program(self, program):
+        self.reset_frames()
+        self.start_budget()
+        # Bhai calls nest Python calls here, so make room for max_depth of them
+        make_room(self.max_depth)
+        try:
+            for statement in program.statements:
+                self.execute(statement)
+        except ReturnSignal as signal:
+            # A top-level wapas ends the program with that value
+            return text(signal.value)
+        except RecursionError:
+            self.reset_frames()
+            self.too_deep()
+        finally:
+            self.output.flush()
+        return None
+
+    def run_function(self, func):
+        try:
+            for stmt in func.body:
+                # A wapas directly in the body needs no unwinding
+                if stmt.__class__ is Return:
+                    if stmt.value.__class__ is FunctionCall:
+                        call = self.tail_call(stmt.value)
+                        if call is not None:
+                            raise call
+                    return self.evaluate(stmt.value)
+                self.execute(stmt)
+        except ReturnSignal as signal:
+            return signal.value
+        return None
     
     def execute(self, node):
         if isinstance(node, Program):
-            for statement in node.statements:
-                result = self.execute(statement)
-                if result == "break":
-                    break
-            return None
+            return self.run_program(self.prepare(node))
         
         elif isinstance(node, BhaiStatement):
-            value = self.evaluate(node.value)
-            self.variables[node.name] = value
+            if node.local:
+                self.locals[node.slot] = self.evaluate(node.value)
+            else:
+                self.globals[node.slot] = self.evaluate(node.value)
             return None
         
         elif isinstance(node, Assignment):
-            value = self.evaluate(node.value)
-            self.variables[node.name] = value
+            if node.local:
+                self.locals[node.slot] = self.evaluate(node.value)
+            else:
+                self.globals[node.slot] = self.evaluate(node.value)
             return None
         
         elif isinstance(node, BolStatement):
-            value = self.evaluate(node.expression)
-            print(value)
+            self.output.write_line(self.render(self.evaluate(node.expression)))
             return None
         
         elif isinstance(node, IfStatement):
@@ -38,25 +432,48 @@ class BhaiInterpreter:
             
             if self.is_truthy(condition):
                 for stmt in node.then_block:
-                    result = self.execute(stmt)
-                    if isinstance(result, Return):
-                        return result
+                    self.execute(stmt)
             elif node.else_block:
                 for stmt in node.else_block:
-                    result = self.execute(stmt)
-                    if isinstance(result, Return):
-                        return result
+                    self.execute(stmt)
             
             return None
         
         elif isinstance(node, WhileLoop):
-            while self.is_truthy(self.evaluate(node.condition)):
-                for stmt in node.body:
-                    result = self.execute(stmt)
-                    if result == "break":
-                        return None
-                    if isinstance(result, Return):
-                        return result
+            try:
+                while self.is_truthy(self.evaluate(node.condition)):
+                    try:
+                        for stmt in node.body:
+                            self.execute(stmt)
+                    except ContinueSignal:
+                        pass
+                    # One step per iteration, like the VM's JUMP_BACK
+                    self.countdown -= 1
+                    if not self.countdown:
+                        self.checkpoint()
+            except BreakSignal:
+                pass
+            return None
+
+        elif isinstance(node, ForEachLoop):
+            iterator = self.iterate(self.evaluate(node.iterable))
+            # The loop variable is stored straight into its slot
+            store = self.locals if node.local else self.globals
+            slot = node.slot
+            try:
+                for item in iterator:
+                    store[slot] = item
+                    try:
+                        for stmt in node.body:
+                            self.execute(stmt)
+                    except ContinueSignal:
+                        pass
+                    # One step per iteration, like the VM's JUMP_BACK
+                    self.countdown -= 1
+                    if not self.countdown:
+                        self.checkpoint()
+            except BreakSignal:
+                pass
             return None
         
         elif isinstance(node, FunctionDef):
@@ -64,13 +481,30 @@ class BhaiInterpreter:
             return None
         
         elif isinstance(node, Return):
-            return Return(self.evaluate(node.value))
+            if node.value.__class__ is FunctionCall:
+                call = self.tail_call(node.value)
+                if call is not None:
+                    raise call
+            raise ReturnSignal(self.evaluate(node.value))
         
-        elif node == "break":
-            return "break"
+        elif isinstance(node, Break):
+            raise BREAK.with_traceback(None)
+
+        elif isinstance(node, Continue):
+            raise CONTINUE.with_traceback(None)
+
+        elif isinstance(node, IndexAssignment):
+            target = self.evaluate(node.target)
+            index = self.evaluate(node.index)
+            value = self.evaluate(node.value)
+            if self.globals.__class__ is ReadOnlyGlobals:
+                self.pure_store(node.slot, target)
+            self.set_item(target, index, value)
+            return None
         
         else:
-            return self.evaluate(node)
+            self.evaluate(node)
+            return None
     
     def evaluate(self, node):
         if isinstance(node, Number):
@@ -80,51 +514,21 @@ class BhaiInterpreter:
             return node.value
         
         elif isinstance(node, Identifier):
-            if node.name not in self.variables:
-                self.error(f'Variable "{node.name}" ko pehle define karo bhai! '
-                          f'Ye kya undefined variable use kar rahe ho? 📚')
-            return self.variables[node.name]
+            if node.local:
+                value = self.locals[node.slot]
+            else:
+                value = self.globals[node.slot]
+            if value is UNSET:
+                self.undefined_variable(node.name)
+            return value
         
         elif isinstance(node, BinaryOp):
             left = self.evaluate(node.left)
             right = self.evaluate(node.right)
-            op = node.op.type
-            
-            if op == TokenType.PLUS:
-                if isinstance(left, str) or isinstance(right, str):
-                    return str(left) + str(right)
-                return left + right
-            
-            elif op == TokenType.MINUS:
-                if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
-                    self.error("Bhai, numbers ka hi subtraction hota hai! "
-                             "String se kya ghata rahe ho? 🤷‍♂️")
-                return left - right
-            
-            elif op == TokenType.MULTIPLY:
-                if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
-                    self.error("Bhai, numbers ka hi multiplication hota hai!")
-                return left * right
-            
-            elif op == TokenType.DIVIDE:
-                if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
-                    self.error("Bhai, numbers ka hi division hota hai!")
-                if right == 0:
-                    self.error("Arre bhai! Zero se divide kar rahe ho? "
-                             "Maths class mein soye the kya? 💤")
-                return left / right
-            
-            elif op == TokenType.BARABAR:
-                return 1 if left == right else 0
-            
-            elif op == TokenType.BADA:
-                return 1 if left > right else 0
-            
-            elif op == TokenType.CHOTA:
-                return 1 if left < right else 0
-            
-            else:
-                self.error(f"Unknown operator: {op}")
+            handler = node.handler
+            if handler is None:
+                return self.specialize(node, left, right)
+            return handler(self, node, left, right)
         
         elif isinstance(node, UnaryOp):
             operand = self.evaluate(node.operand)
@@ -132,17 +536,8 @@ class BhaiInterpreter:
                 return -operand
         
         elif isinstance(node, FunctionCall):
-            # Built-in functions
-            if node.name == "range":
-                if len(node.args) == 1:
-                    return list(range(int(self.evaluate(node.args[0]))))
-                elif len(node.args) == 2:
-                    return list(range(int(self.evaluate(node.args[0])), 
-                                    int(self.evaluate(node.args[1]))))
-                elif len(node.args) == 3:
-                    return list(range(int(self.evaluate(node.args[0])), 
-                                    int(self.evaluate(node.args[1])),
-                                    int(self.evaluate(node.args[2]))))
+            if node.builtin is not None:
+                return self.call_builtin(node.builtin, [self.evaluate(arg) for arg in node.args])
 
             if node.name not in self.functions:
                 self.error(f'Function "{node.name}" define hi nahi hai bhai! '
@@ -154,28 +549,187 @@ class BhaiInterpreter:
                 self.error(f'Function "{node.name}" ko {len(func.params)} arguments chahiye, '
                           f'tumne {len(node.args)} diye! Count toh sahi karo! 🔢')
 
-            old_vars = self.variables.copy()
-
-            for param, arg in zip(func.params, node.args):
-                self.variables[param] = self.evaluate(arg)
-
-            result = None
-            for stmt in func.body:
-                exec_result = self.execute(stmt)
-                if isinstance(exec_result, Return):
-                    result = exec_result.value
-                    break
-
-            self.variables = old_vars
-            
-            return result
+            args = [self.evaluate(arg) for arg in node.args]
+            return self.call_function(func, args)
         
         elif isinstance(node, ListLiteral):
-            return [self.evaluate(elem) for elem in node.elements]
+            return make_list([self.evaluate(elem) for elem in node.elements])
+
+        elif isinstance(node, Index):
+            return self.get_item(self.evaluate(node.target), self.evaluate(node.index))
+
+        elif isinstance(node, Slice):
+            target = self.evaluate(node.target)
+            start = None if node.start is None else self.evaluate(node.start)
+            stop = None if node.stop is None else self.evaluate(node.stop)
+            return self.get_slice(target, start, stop)
         
         else:
             self.error(f"Cannot evaluate: {type(node)}")
     
+    def binary(self, node, left, right):
+        # The generic path: every operator, any operand types
+        op = node.op.type
+        if self.vector:
+            result = self.vectorize(op, left, right)
+            if result is not None:
+                return result
+        
+        if op == TokenType.PLUS:
+            if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+                return left + right
+            return self.concat(left, right)
+        
+        elif op == TokenType.MINUS:
+            if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+                self.error("Bhai, numbers ka hi subtraction hota hai! "
+                         "String se kya ghata rahe ho? 🤷‍♂️")
+            return left - right
+        
+        elif op == TokenType.MULTIPLY:
+            if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+                self.error("Bhai, numbers ka hi multiplication hota hai!")
+            return left * right
+        
+        elif op == TokenType.DIVIDE:
+            if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+                self.error("Bhai, numbers ka hi division hota hai!")
+            if right == 0:
+                self.error("Arre bhai! Zero se divide kar rahe ho? "
+                         "Maths class mein soye the kya? 💤")
+            return left / right
+        
+        elif op == TokenType.BARABAR:
+            return 1 if left == right else 0
+        
+        elif op == TokenType.BADA:
+            return 1 if left > right else 0
+        
+        elif op == TokenType.CHOTA:
+            return 1 if left < right else 0
+        
+        else:
+            self.error(f"Unknown operator: {op}")
+
+    def specialize(self, node, left, right):
+        # Picks a handler for this BinaryOp from its operator and the operand
+        # types seen on the first run. The handlers guard on those types and
+        # switch the node back to binary() for good when the guard fails.
+        op = node.op.type
+        if op == TokenType.PLUS:
+            if left.__class__ in TEXT and right.__class__ is str:
+                handler = BhaiInterpreter.add_strings
+            elif left.__class__ in NUMBERS and right.__class__ in NUMBERS:
+                handler = BhaiInterpreter.add_numbers
+            else:
+                handler = BhaiInterpreter.binary
+        else:
+            handler = self.binary_handlers.get(op, BhaiInterpreter.binary)
+        node.handler = handler
+        return handler(self, node, left, right)
+
+    def unspecialize(self, node, left, right):
+        node.handler = BhaiInterpreter.binary
+        return self.binary(node, left, right)
+
+    def add_numbers(self, node, left, right):
+        if left.__class__ in NUMBERS and right.__class__ in NUMBERS:
+            return left + right
+        return self.unspecialize(node, left, right)
+
+    def add_strings(self, node, left, right):
+        if right.__class__ is str:
+            if left.__class__ is str and len(left) < ROPE_MIN:
+                result = left + right
+                if len(result) > self.size_limit:
+                    self.check_size(result)
+                return result
+            if left.__class__ in TEXT:
+                return self.concat(left, right)
+        return self.unspecialize(node, left, right)
+
+    def sub_numbers(self, node, left, right):
+        if left.__class__ in NUMBERS and right.__class__ in NUMBERS:
+            return left - right
+        return self.unspecialize(node, left, right)
+
+    def mul_numbers(self, node, left, right):
+        if left.__class__ in NUMBERS and right.__class__ in NUMBERS:
+            return left * right
+        return self.unspecialize(node, left, right)
+
+    def div_numbers(self, node, left, right):
+        if left.__class__ in NUMBERS and right.__class__ in NUMBERS and right:
+            return left / right
+        # Division by zero is reported by binary()
+        return self.unspecialize(node, left, right)
+
+    # Comparisons work on any types, so they need no guard
+    def compare_eq(self, node, left, right):
+        return 1 if left == right else 0
+
+    def compare_gt(self, node, left, right):
+        return 1 if left > right else 0
+
+    def compare_lt(self, node, left, right):
+        return 1 if left < right else 0
+
+    binary_handlers = {
+        TokenType.MINUS: sub_numbers,
+        TokenType.MULTIPLY: mul_numbers,
+        TokenType.DIVIDE: div_numbers,
+        TokenType.BARABAR: compare_eq,
+        TokenType.BADA: compare_gt,
+        TokenType.CHOTA: compare_lt,
+    }
+
+    def not_a_sequence(self, value):
+        self.error(f'{type(value).__name__} mein index nahi lagta bhai, '
+                  f'list, range ya string chahiye! 📦')
+
+    def check_index(self, index):
+        if index.__class__ is not int:
+            self.error(f'Index integer hona chahiye, {index!r} nahi chalega! 🔢')
+
+    def get_item(self, target, index):
+        # Negative indexes count from the end, like Python
+        if target.__class__ is BhaiList:
+            target = target.items
+        elif not isinstance(target, SEQUENCES):
+            self.not_a_sequence(target)
+        if index.__class__ is not int:
+            self.check_index(index)
+        try:
+            return target[index]
+        except IndexError:
+            self.error(f'Index {index} list ke bahar hai, lambai sirf {len(target)} hai! 📏')
+
+    def set_item(self, target, index, value):
+        if not isinstance(target, (BhaiList, list)):
+            self.error(f'{type(text(target)).__name__} ke andar assign nahi kar sakte, '
+                      f'sirf list ke element badalte hain! 📦')
+        if index.__class__ is not int:
+            self.check_index(index)
+        try:
+            target[index] = value
+        except IndexError:
+            self.error(f'Index {index} list ke bahar hai, lambai sirf {len(target)} hai! 📏')
+
+    def get_slice(self, target, start, stop):
+        if not isinstance(target, SEQUENCES):
+            self.not_a_sequence(target)
+        for bound in (start, stop):
+            if bound is not None:
+                self.check_index(bound)
+        return target[start:stop]
+
+    def iterate(self, value):
+        # Lists, ranges and strings are walked in place, never copied
+        if not isinstance(value, SEQUENCES):
+            self.error(f'har_ek sirf list, range ya string pe chalta hai, '
+                      f'ye {type(value).__name__} kya hai bhai? 🔁')
+        return iter(value)
+
     def is_truthy(self, value):
         if value == 0 or value == "" or value is None:
             return False
@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from values import BhaiList, copy_list
+
+MISSING = object()
+
+class MemoCache:
+    # Bounded LRU of results for one yaad_rakh kaam, keyed by argument tuple.
+    # Lists can be changed in place, so a list result is copied going in and
+    # again coming out: no caller can change what the next one gets.
+    __slots__ = ('name', 'maxsize', 'entries', 'hits', 'misses')
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except (KeyError, TypeError):
+            # TypeError: an unhashable argument such as a list
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        if value.__class__ is BhaiList:
+            return copy_list(value)
+        return value
+
+    def put(self, key, value):
+        if value.__class__ is BhaiList:
+            value = copy_list(value)
+        try:
+            self.entries[key] = value
+        except TypeError:
+            return
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.entries), 'maxsize': self.maxsize}
+
+def memo_key(args):
+    # Types are part of the key so fib(1) and fib(1.0) stay apart
+    return tuple((type(arg), arg) for arg in args)
+
+class ReadOnlyGlobals:
+    # Stands in for the globals list while a yaad_rakh kaam runs, so any
+    # write to a global - from that kaam or anything it calls - is caught.
+    __slots__ = ('values', 'interpreter', 'function')
+
+    def __init__(self, values, interpreter, function):
+        self.values = values
+        self.interpreter = interpreter
+        self.function = function
+
+    def __getitem__(self, slot):
+        return self.values[slot]
+
+    def __setitem__(self, slot, value):
+        self.interpreter.impure_memo(self.function, slot)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
@@ -0,0 +1,225 @@
+from parser import *
+from tokenizer import TokenType
+
+NUMBER_TYPES = (int, float)
+
+class NotConstant(Exception):
+    # The expression would raise or has no fixed value; leave it for runtime
+    pass
+
+def fold_binary(op, left, right):
+    # Same rules as BhaiInterpreter.evaluate, minus everything that errors
+    if op == TokenType.PLUS:
+        if isinstance(left, str) or isinstance(right, str):
+            return str(left) + str(right)
+        return left + right
+
+    if op in (TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE):
+        if not (isinstance(left, NUMBER_TYPES) and isinstance(right, NUMBER_TYPES)):
+            raise NotConstant()
+        if op == TokenType.MINUS:
+            return left - right
+        if op == TokenType.MULTIPLY:
+            return left * right
+        if right == 0:
+            raise NotConstant()
+        return left / right
+
+    if op == TokenType.BARABAR:
+        return 1 if left == right else 0
+
+    if isinstance(left, str) != isinstance(right, str):
+        # "a" bada 1 is a TypeError at runtime
+        raise NotConstant()
+    if op == TokenType.BADA:
+        return 1 if left > right else 0
+    if op == TokenType.CHOTA:
+        return 1 if left < right else 0
+    raise NotConstant()
+
+def constant(value, node):
+    # A literal standing in for `node`, at the same source position
+    result = String(value) if isinstance(value, str) else Number(value)
+    for field in ('line', 'column'):
+        if hasattr(node, field):
+            setattr(result, field, getattr(node, field))
+    return result
+
+def is_truthy(value):
+    return not (value == 0 or value == "" or value is None)
+
+def declares(statements):
+    # Whether dead code still names something the resolver looks at: a
+    # variable (a global at the top level, a local in a kaam) or a kaam,
+    # which hides the builtin of the same name
+    for stmt in statements:
+        if isinstance(stmt, (BhaiStatement, Assignment, FunctionDef)):
+            return True
+        if isinstance(stmt, IfStatement):
+            if declares(stmt.then_block) or declares(stmt.else_block or []):
+                return True
+        elif isinstance(stmt, ForEachLoop):
+            return True
+        elif isinstance(stmt, WhileLoop) and declares(stmt.body):
+            return True
+    return False
+
+class Optimizer:
+    # Runs between Parser.parse() and execute():
+    #   - folds BinaryOp/UnaryOp trees whose operands are all literals
+    #   - replaces `agar` on a constant condition with the branch that runs
+    #   - drops `jab_tak` loops whose condition is constant false
+    #   - drops statements after `wapas`, `bas_kar` and `aage_badh`
+    #
+    # Anything that would fail at runtime (bhag_kar(1, 0), "a" - 1, ...) is
+    # left untouched so the error still happens when, and only if, it runs.
+    # The resolver decides scoping from declarations wherever they are, run
+    # or not, so dead code that declares a variable or a kaam is kept.
+
+    def optimize(self, program):
+        program.statements = self.optimize_block(program.statements)
+        return program
+
+    def optimize_block(self, statements):
+        result = []
+        for stmt in statements:
+            stmt = self.optimize_statement(stmt)
+            if isinstance(stmt, list):
+                result.extend(stmt)
+            else:
+                result.append(stmt)
+
+        for index, stmt in enumerate(result):
+            if isinstance(stmt, (Return, Break, Continue)):
+                if self.removable(result[index + 1:]):
+                    del result[index + 1:]
+                break
+        return result
+
+    def removable(self, statements):
+        return not declares(statements)
+
+    def optimize_statement(self, node):
+        method = self.statement_optimizers.get(type(node))
+        if method is None:
+            return self.optimize_expression(node)
+        return method(self, node)
+
+    def optimize_assignment(self, node):
+        node.value = self.optimize_expression(node.value)
+        return node
+
+    def optimize_bol(self, node):
+        node.expression = self.optimize_expression(node.expression)
+        return node
+
+    def optimize_return(self, node):
+        node.value = self.optimize_expression(node.value)
+        return node
+
+    def optimize_if(self, node):
+        node.condition = self.optimize_expression(node.condition)
+        node.then_block = self.optimize_block(node.then_block)
+        if node.else_block:
+            node.else_block = self.optimize_block(node.else_block)
+
+        if not isinstance(node.condition, (Number, String)):
+            return node
+
+        if is_truthy(node.condition.value):
+            taken, dropped = node.then_block, node.else_block or []
+        else:
+            taken, dropped = node.else_block or [], node.then_block
+
+        if not self.removable(dropped):
+            return node
+        return taken
+
+    def optimize_while(self, node):
+        node.condition = self.optimize_expression(node.condition)
+        node.body = self.optimize_block(node.body)
+
+        if (isinstance(node.condition, (Number, String))
+                and not is_truthy(node.condition.value) and self.removable(node.body)):
+            return []
+        return node
+
+    def optimize_for(self, node):
+        node.iterable = self.optimize_expression(node.iterable)
+        node.body = self.optimize_block(node.body)
+        return node
+
+    def optimize_function_def(self, node):
+        node.body = self.optimize_block(node.body)
+        return node
+
+    def optimize_expression(self, node):
+        method = self.expression_optimizers.get(type(node))
+        if method is None:
+            return node
+        return method(self, node)
+
+    def optimize_binary(self, node):
+        node.left = self.optimize_expression(node.left)
+        node.right = self.optimize_expression(node.right)
+        if isinstance(node.left, (Number, String)) and isinstance(node.right, (Number, String)):
+            try:
+                return constant(fold_binary(node.op.type, node.left.value, node.right.value), node)
+            except NotConstant:
+                pass
+        return node
+
+    def optimize_unary(self, node):
+        node.operand = self.optimize_expression(node.operand)
+        if (node.op.type == TokenType.MINUS and isinstance(node.operand, Number)
+                and isinstance(node.operand.value, NUMBER_TYPES)):
+            return constant(-node.operand.value, node)
+        return node
+
+    def optimize_call(self, node):
+        node.args = [self.optimize_expression(arg) for arg in node.args]
+        return node
+
+    def optimize_list(self, node):
+        node.elements = [self.optimize_expression(elem) for elem in node.elements]
+        return node
+
+    def optimize_index(self, node):
+        node.target = self.optimize_expression(node.target)
+        node.index = self.optimize_expression(node.index)
+        return node
+
+    def optimize_slice(self, node):
+        node.target = self.optimize_expression(node.target)
+        node.start = self.optimize_expression(node.start)
+        node.stop = self.optimize_expression(node.stop)
+        return node
+
+    def optimize_index_assignment(self, node):
+        node = self.optimize_index(node)
+        node.value = self.optimize_expression(node.value)
+        return node
+
+    statement_optimizers = {
+        BhaiStatement: optimize_assignment,
+        Assignment: optimize_assignment,
+        BolStatement: optimize_bol,
+        IfStatement: optimize_if,
+        WhileLoop: optimize_while,
+        ForEachLoop: optimize_for,
+        FunctionDef: optimize_function_def,
+        Return: optimize_return,
+        IndexAssignment: optimize_index_assignment,
+    }
+
+    expression_optimizers = {
+        BinaryOp: optimize_binary,
+        UnaryOp: optimize_unary,
+        FunctionCall: optimize_call,
+        ListLiteral: optimize_list,
+        Index: optimize_index,
+        Slice: optimize_slice,
+    }
+
+def optimize(program):
+    return Optimizer().optimize(program)
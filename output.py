@@ -0,0 +1,53 @@
+import sys
+
+FLUSH_POLICIES = ('line', 'size', 'program')
+
+class BufferedOutput:
+    # Where `bhai bol` writes. Text is collected in a buffer and written to
+    # the stream in one go, depending on the flush policy:
+    #   line    - after every line (what a terminal wants)
+    #   size    - once `size` characters are waiting
+    #   program - only when the program finishes
+    # The interpreters always flush at the end of a run, error or not.
+    #
+    # With no stream, sys.stdout is looked up on every flush so
+    # redirect_stdout keeps working. Pass an io.StringIO to capture output.
+
+    def __init__(self, stream=None, policy=None, size=8192):
+        if policy is None:
+            target = stream if stream is not None else sys.stdout
+            isatty = getattr(target, 'isatty', None)
+            policy = 'line' if isatty is not None and isatty() else 'size'
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {policy}")
+        self.stream = stream
+        self.policy = policy
+        self.size = size
+        self.parts = []
+        self.pending = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.policy == 'line':
+            if '\n' in text:
+                self.flush()
+        elif self.policy == 'size' and self.pending >= self.size:
+            self.flush()
+
+    def write_line(self, value):
+        self.write(f"{value}\n")
+
+    def flush(self):
+        if not self.parts:
+            return
+        text = ''.join(self.parts)
+        self.parts = []
+        self.pending = 0
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def getvalue(self):
+        self.flush()
+        return self.stream.getvalue()
@@ -1,83 +1,173 @@
-from tokenizer import TokenType
+from collections import deque
+from tokenizer import Token, TokenType
+
+# Shared operator tokens for the jod/ghata/guna/bhag_kar desugaring
+PLUS_TOKEN = Token(TokenType.PLUS, '+', 0, 0)
+MINUS_TOKEN = Token(TokenType.MINUS, '-', 0, 0)
+MULTIPLY_TOKEN = Token(TokenType.MULTIPLY, '*', 0, 0)
+DIVIDE_TOKEN = Token(TokenType.DIVIDE, '/', 0, 0)
 
 class ASTNode:
-    pass
+    # Every node remembers where it starts in the source (1-based)
+    __slots__ = ('line', 'column')
 
 class Program(ASTNode):
+    __slots__ = ('statements',)
+
     def __init__(self, statements):
         self.statements = statements
 
 class BhaiStatement(ASTNode):
+    __slots__ = ('name', 'value', 'slot', 'local')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
 class BolStatement(ASTNode):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
 class Assignment(ASTNode):
+    __slots__ = ('name', 'value', 'slot', 'local')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
 class BinaryOp(ASTNode):
+    # handler is filled in by the tree-walker the first time the node runs
+    __slots__ = ('left', 'op', 'right', 'handler')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
+        self.handler = None
 
 class UnaryOp(ASTNode):
+    __slots__ = ('op', 'operand')
+
     def __init__(self, op, operand):
         self.op = op
         self.operand = operand
 
 class Number(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class String(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class Identifier(ASTNode):
+    __slots__ = ('name', 'slot', 'local')
+
     def __init__(self, name):
         self.name = name
 
 class FunctionCall(ASTNode):
+    # builtin is filled in by the resolver: the stdlib.Builtin this call
+    # site runs, or None for a kaam
+    __slots__ = ('name', 'args', 'builtin')
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
+        self.builtin = None
 
 class IfStatement(ASTNode):
+    __slots__ = ('condition', 'then_block', 'else_block')
+
     def __init__(self, condition, then_block, else_block=None):
         self.condition = condition
         self.then_block = then_block
         self.else_block = else_block
 
 class WhileLoop(ASTNode):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
+class ForEachLoop(ASTNode):
+    __slots__ = ('name', 'iterable', 'body', 'slot', 'local')
+
+    def __init__(self, name, iterable, body):
+        self.name = name
+        self.iterable = iterable
+        self.body = body
+
+class Break(ASTNode):
+    __slots__ = ()
+
+class Continue(ASTNode):
+    __slots__ = ()
+
 class FunctionDef(ASTNode):
-    def __init__(self, name, params, body):
+    __slots__ = ('name', 'params', 'body', 'memoize', 'memo_size',
+                 'param_slots', 'local_names', 'nlocals')
+
+    def __init__(self, name, params, body, memoize=False, memo_size=None):
         self.name = name
         self.params = params
         self.body = body
+        # yaad_rakh kaam: cache results; memo_size None means the default
+        self.memoize = memoize
+        self.memo_size = memo_size
 
 class Return(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class ListLiteral(ASTNode):
+    __slots__ = ('elements',)
+
     def __init__(self, elements):
         self.elements = elements
 
+class Index(ASTNode):
+    __slots__ = ('target', 'index')
+
+    def __init__(self, target, index):
+        self.target = target
+        self.index = index
+
+class Slice(ASTNode):
+    # start and stop are None when left out: xs[:3], xs[2:]
+    __slots__ = ('target', 'start', 'stop')
+
+    def __init__(self, target, start, stop):
+        self.target = target
+        self.start = start
+        self.stop = stop
+
+class IndexAssignment(ASTNode):
+    # slot is set by the resolver when the list is reached through a global
+    __slots__ = ('target', 'index', 'value', 'slot')
+
+    def __init__(self, target, index, value):
+        self.target = target
+        self.index = index
+        self.value = value
+
 class Parser:
+    # Tokens can be a list or any iterator (e.g. Tokenizer.stream); the
+    # parser only keeps the current token plus what peek_token asked for.
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+        self.current = next(self.tokens)
+        self.loop_depth = 0
     
     def error(self, msg):
         token = self.current_token()
@@ -85,18 +175,25 @@ class Parser:
                          f"Bhai, type karna nahi aata kya? 😤")
     
     def current_token(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return self.tokens[-1]  # EOF
+        return self.current
     
     def peek_token(self, offset=1):
-        pos = self.pos + offset
-        if pos < len(self.tokens):
-            return self.tokens[pos]
-        return self.tokens[-1]
+        lookahead = self.lookahead
+        while len(lookahead) < offset:
+            if lookahead:
+                last = lookahead[-1]
+            else:
+                last = self.current
+            if last.type == TokenType.EOF:
+                return last
+            lookahead.append(next(self.tokens, last))
+        return lookahead[offset - 1]
     
     def advance(self):
-        self.pos += 1
+        if self.lookahead:
+            self.current = self.lookahead.popleft()
+        elif self.current.type != TokenType.EOF:
+            self.current = next(self.tokens, self.current)
     
     def expect(self, token_type):
         if self.current_token().type != token_type:
@@ -105,13 +202,19 @@ class Parser:
         self.advance()
         return token
     
+    def located(self, node, token):
+        node.line = token.line
+        node.column = token.column
+        return node
+
     def skip_newlines(self):
-        while self.current_token().type == TokenType.NEWLINE:
+        while self.current_token().type in (TokenType.NEWLINE, TokenType.SEMICOLON):
             self.advance()
     
     def parse(self):
         statements = []
         self.skip_newlines()
+        start = self.current_token()
         
         while self.current_token().type != TokenType.EOF:
             stmt = self.parse_statement()
@@ -119,12 +222,14 @@ class Parser:
                 statements.append(stmt)
             self.skip_newlines()
         
-        return Program(statements)
+        return self.located(Program(statements), start)
     
     def parse_statement(self):
         self.skip_newlines()
         token = self.current_token()
+        return self.located(self.parse_statement_node(token), token)
 
+    def parse_statement_node(self, token):
         if token.type == TokenType.BHAI:
             return self.parse_bhai_statement()
 
@@ -134,15 +239,29 @@ class Parser:
         elif token.type == TokenType.JAB_TAK:
             return self.parse_while_loop()
 
+        elif token.type == TokenType.HAR_EK:
+            return self.parse_for_loop()
+
         elif token.type == TokenType.KAAM:
             return self.parse_function_def()
 
+        elif token.type == TokenType.YAAD_RAKH:
+            return self.parse_memoized_def()
+
         elif token.type == TokenType.WAPAS:
             return self.parse_return()
 
         elif token.type == TokenType.BAS_KAR:
+            if not self.loop_depth:
+                self.error("bas_kar sirf loop ke andar chalta hai bhai! 🛑")
+            self.advance()
+            return Break()
+
+        elif token.type == TokenType.AAGE_BADH:
+            if not self.loop_depth:
+                self.error("aage_badh sirf loop ke andar chalta hai bhai! 🔁")
             self.advance()
-            return "break"
+            return Continue()
 
         elif token.type == TokenType.IDENTIFIER:
             if self.peek_token().type == TokenType.EQUALS:
@@ -152,7 +271,10 @@ class Parser:
                 value = self.parse_expression()
                 return Assignment(name, value)
             else:
-                return self.parse_expression()
+                expr = self.parse_expression()
+                if self.current_token().type == TokenType.EQUALS:
+                    return self.parse_index_assignment(expr)
+                return expr
         
         else:
             return self.parse_expression()
@@ -172,6 +294,14 @@ class Parser:
         value = self.parse_expression()
         
         return BhaiStatement(name_token.value, value)
+
+    def parse_index_assignment(self, target):
+        # xs[i] = value; the target has already been parsed as an Index
+        if not isinstance(target, Index):
+            self.error("Sirf list ke element mein assign kar sakte ho, jaise xs[0] = 5! 📦")
+        self.expect(TokenType.EQUALS)
+        value = self.parse_expression()
+        return IndexAssignment(target.target, target.index, value)
     
     def parse_if_statement(self):
         self.expect(TokenType.AGAR)
@@ -196,6 +326,13 @@ class Parser:
         else_block = None
         if self.current_token().type == TokenType.NAHI_TOH:
             self.advance()
+
+            # nahi_toh agar (...) { ... } chains into a nested if
+            if self.current_token().type == TokenType.AGAR:
+                token = self.current_token()
+                nested = self.located(self.parse_if_statement(), token)
+                return IfStatement(condition, then_block, [nested])
+
             self.expect(TokenType.LBRACE)
             self.skip_newlines()
             
@@ -216,19 +353,32 @@ class Parser:
         condition = self.parse_expression()
         self.expect(TokenType.RPAREN)
         
+        body = self.parse_loop_body()
+        return WhileLoop(condition, body)
+
+    def parse_for_loop(self):
+        self.expect(TokenType.HAR_EK)
+        name = self.expect(TokenType.IDENTIFIER).value
+        self.expect(TokenType.IN)
+        iterable = self.parse_expression()
+        body = self.parse_loop_body()
+        return ForEachLoop(name, iterable, body)
+
+    def parse_loop_body(self):
         self.expect(TokenType.LBRACE)
         self.skip_newlines()
-        
+
+        self.loop_depth += 1
         body = []
         while self.current_token().type != TokenType.RBRACE:
             stmt = self.parse_statement()
             if stmt:
                 body.append(stmt)
             self.skip_newlines()
-        
+        self.loop_depth -= 1
+
         self.expect(TokenType.RBRACE)
-        
-        return WhileLoop(condition, body)
+        return body
     
     def parse_function_def(self):
         self.expect(TokenType.KAAM)
@@ -248,17 +398,39 @@ class Parser:
         self.expect(TokenType.LBRACE)
         self.skip_newlines()
         
+        # A loop outside the kaam doesn't make bas_kar/aage_badh valid inside it
+        saved_depth = self.loop_depth
+        self.loop_depth = 0
         body = []
         while self.current_token().type != TokenType.RBRACE:
             stmt = self.parse_statement()
             if stmt:
                 body.append(stmt)
             self.skip_newlines()
+        self.loop_depth = saved_depth
         
         self.expect(TokenType.RBRACE)
         
         return FunctionDef(name, params, body)
     
+    def parse_memoized_def(self):
+        # yaad_rakh kaam f(...) { ... }  or  yaad_rakh(500) kaam f(...) { ... }
+        self.expect(TokenType.YAAD_RAKH)
+        size = None
+        if self.current_token().type == TokenType.LPAREN:
+            self.advance()
+            size = self.expect(TokenType.NUMBER).value
+            if not isinstance(size, int) or size < 1:
+                self.error(f"yaad_rakh ka size positive integer hona chahiye, {size} nahi! 🧠")
+            self.expect(TokenType.RPAREN)
+
+        if self.current_token().type != TokenType.KAAM:
+            self.error("yaad_rakh ke baad kaam likho bhai! 🧠")
+        func = self.parse_function_def()
+        func.memoize = True
+        func.memo_size = size
+        return func
+
     def parse_return(self):
         self.expect(TokenType.WAPAS)
         value = self.parse_expression()
@@ -274,7 +446,7 @@ class Parser:
             op = self.current_token()
             self.advance()
             right = self.parse_additive()
-            left = BinaryOp(left, op, right)
+            left = self.located(BinaryOp(left, op, right), op)
         
         return left
     
@@ -285,7 +457,7 @@ class Parser:
             op = self.current_token()
             self.advance()
             right = self.parse_multiplicative()
-            left = BinaryOp(left, op, right)
+            left = self.located(BinaryOp(left, op, right), op)
         
         return left
     
@@ -296,7 +468,7 @@ class Parser:
             op = self.current_token()
             self.advance()
             right = self.parse_unary()
-            left = BinaryOp(left, op, right)
+            left = self.located(BinaryOp(left, op, right), op)
         
         return left
     
@@ -305,13 +477,36 @@ class Parser:
             op = self.current_token()
             self.advance()
             operand = self.parse_unary()
-            return UnaryOp(op, operand)
+            return self.located(UnaryOp(op, operand), op)
         
         return self.parse_primary()
     
     def parse_primary(self):
         token = self.current_token()
-        
+        node = self.located(self.parse_primary_node(token), token)
+        # Any number of [i] or [a:b] after it: grid[i][j]
+        while self.current_token().type == TokenType.LBRACKET:
+            node = self.parse_subscript(node)
+        return node
+
+    def parse_subscript(self, target):
+        bracket = self.expect(TokenType.LBRACKET)
+        start = None
+        if self.current_token().type != TokenType.COLON:
+            start = self.parse_expression()
+
+        if self.current_token().type == TokenType.COLON:
+            self.advance()
+            stop = None
+            if self.current_token().type != TokenType.RBRACKET:
+                stop = self.parse_expression()
+            self.expect(TokenType.RBRACKET)
+            return self.located(Slice(target, start, stop), bracket)
+
+        self.expect(TokenType.RBRACKET)
+        return self.located(Index(target, start), bracket)
+
+    def parse_primary_node(self, token):
         # Numbers
         if token.type == TokenType.NUMBER:
             self.advance()
@@ -378,7 +573,7 @@ class Parser:
             self.expect(TokenType.COMMA)
             right = self.parse_expression()
             self.expect(TokenType.RPAREN)
-            return BinaryOp(left, Token(TokenType.PLUS, '+', 0, 0), right)
+            return BinaryOp(left, PLUS_TOKEN, right)
         
         elif token.type == TokenType.GHATA:
             self.advance()
@@ -387,7 +582,7 @@ class Parser:
             self.expect(TokenType.COMMA)
             right = self.parse_expression()
             self.expect(TokenType.RPAREN)
-            return BinaryOp(left, Token(TokenType.MINUS, '-', 0, 0), right)
+            return BinaryOp(left, MINUS_TOKEN, right)
         
         elif token.type == TokenType.GUNA:
             self.advance()
@@ -396,7 +591,7 @@ class Parser:
             self.expect(TokenType.COMMA)
             right = self.parse_expression()
             self.expect(TokenType.RPAREN)
-            return BinaryOp(left, Token(TokenType.MULTIPLY, '*', 0, 0), right)
+            return BinaryOp(left, MULTIPLY_TOKEN, right)
         
         elif token.type == TokenType.BHAG_KAR:
             self.advance()
@@ -405,7 +600,7 @@ class Parser:
             self.expect(TokenType.COMMA)
             right = self.parse_expression()
             self.expect(TokenType.RPAREN)
-            return BinaryOp(left, Token(TokenType.DIVIDE, '/', 0, 0), right)
+            return BinaryOp(left, DIVIDE_TOKEN, right)
         
         else:
             self.error(f"Unexpected token: {token.type}")
@@ -0,0 +1,153 @@
+import sys
+import time
+from parser import Program
+from interpreter import BhaiInterpreter, ReturnSignal
+
+PROGRAM_FRAME = '<program>'
+
+class StatementStats:
+    __slots__ = ('node', 'count', 'total', 'active')
+
+    def __init__(self, node):
+        self.node = node
+        self.count = 0
+        self.total = 0.0
+        self.active = 0
+
+class FunctionStats:
+    __slots__ = ('name', 'calls', 'cumulative', 'self_time')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+
+class ProfilingInterpreter(BhaiInterpreter):
+    # The tree-walker with timing around every statement and kaam call.
+    # It is only used for --profile, so normal runs pay nothing for it.
+    #
+    # Times are inclusive (a jab_tak includes its body) and only the
+    # outermost activation of a statement or kaam is counted, so recursion
+    # isn't counted twice. A kaam's self time excludes the calls it makes.
+
+    def __init__(self, max_depth=1000, output=None, clock=time.perf_counter, **limits):
+        super().__init__(max_depth, output, **limits)
+        self.clock = clock
+        self.statement_stats = {}
+        self.function_stats = {}
+        self.folded = {}
+        self.call_stack = []
+        self.active = {}
+
+    def execute(self, node):
+        if isinstance(node, Program):
+            return self.profile_program(node)
+
+        stats = self.statement_stats.get(id(node))
+        if stats is None:
+            stats = self.statement_stats[id(node)] = StatementStats(node)
+        stats.count += 1
+        stats.active += 1
+        start = self.clock()
+        try:
+            return super().execute(node)
+        finally:
+            elapsed = self.clock() - start
+            stats.active -= 1
+            if not stats.active:
+                stats.total += elapsed
+
+    def profile_program(self, node):
+        # [name, time spent in calls made from this frame]
+        self.call_stack = [[PROGRAM_FRAME, 0.0]]
+        start = self.clock()
+        try:
+            return super().execute(node)
+        finally:
+            elapsed = self.clock() - start
+            self.add_folded(PROGRAM_FRAME, elapsed - self.call_stack[0][1])
+
+    def run_function(self, func):
+        # Timed here rather than in call_function: call_function loops over
+        # tail calls, and each `wapas g(...)` hop should count as a call to g
+        name = func.name
+        depth = self.active.get(name, 0)
+        self.active[name] = depth + 1
+        self.call_stack.append([name, 0.0])
+        start = self.clock()
+        try:
+            # No shortcut for a wapas in the body, so every statement is timed
+            try:
+                for stmt in func.body:
+                    self.execute(stmt)
+            except ReturnSignal as signal:
+                return signal.value
+            return None
+        finally:
+            elapsed = self.clock() - start
+            self.active[name] = depth
+            key = ';'.join(frame[0] for frame in self.call_stack)
+            children = self.call_stack.pop()[1]
+            if self.call_stack:
+                self.call_stack[-1][1] += elapsed
+
+            stats = self.function_stats.get(name)
+            if stats is None:
+                stats = self.function_stats[name] = FunctionStats(name)
+            stats.calls += 1
+            if depth == 0:
+                stats.cumulative += elapsed
+            stats.self_time += elapsed - children
+            self.add_folded(key, elapsed - children)
+
+    def add_folded(self, key, seconds):
+        self.folded[key] = self.folded.get(key, 0.0) + seconds
+
+    # -- reports --
+
+    def hot_statements(self, limit=None):
+        stats = sorted(self.statement_stats.values(), key=lambda s: s.total, reverse=True)
+        return stats[:limit] if limit else stats
+
+    def hot_functions(self):
+        return sorted(self.function_stats.values(), key=lambda s: s.cumulative, reverse=True)
+
+    def report(self, source=None, limit=20, file=None):
+        file = file or sys.stderr
+        lines = source.splitlines() if source else []
+
+        print("\n🔥 Profile: statements by cumulative time", file=file)
+        print(f"{'line':>6} {'count':>10} {'total ms':>11} {'per run µs':>11}  statement", file=file)
+        for stats in self.hot_statements(limit):
+            node = stats.node
+            line = getattr(node, 'line', None)
+            if line is not None and 0 < line <= len(lines):
+                text = lines[line - 1].strip()
+            else:
+                text = type(node).__name__
+            print(f"{line if line is not None else '?':>6} {stats.count:>10,} "
+                  f"{stats.total * 1000:11.3f} {stats.total / stats.count * 1e6:11.2f}  {text}",
+                  file=file)
+
+        if self.function_stats:
+            print("\n🔥 Profile: kaam functions", file=file)
+            print(f"{'kaam':<20} {'calls':>10} {'cumulative ms':>14} {'self ms':>11}", file=file)
+            for stats in self.hot_functions():
+                print(f"{stats.name:<20} {stats.calls:>10,} {stats.cumulative * 1000:14.3f} "
+                      f"{stats.self_time * 1000:11.3f}", file=file)
+
+    def folded_lines(self):
+        # Brendan Gregg's folded format ("a;b;c value"), value in microseconds,
+        # ready for flamegraph.pl or speedscope
+        lines = []
+        for key, seconds in sorted(self.folded.items()):
+            micros = round(seconds * 1e6)
+            if micros > 0:
+                lines.append(f"{key} {micros}")
+        return lines
+
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.folded_lines():
+                f.write(line + '\n')
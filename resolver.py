@@ -0,0 +1,210 @@
+from parser import *
+from stdlib import BUILTINS
+
+class Unset:
+    # Marks a slot that has not been assigned yet
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'UNSET'
+
+UNSET = Unset()
+
+class SymbolTable:
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        # Names a top-level bhai, assignment or har_ek creates. Only these
+        # make an assignment inside a kaam update a global; a name that is
+        # merely read somewhere also gets a slot, but stays out of here.
+        self.declared = set()
+
+    def __len__(self):
+        return len(self.names)
+
+    def slot(self, name):
+        slot = self.index.get(name)
+        if slot is None:
+            slot = self.index[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+class Resolver:
+    # Gives every variable name a fixed slot so the interpreters can index a
+    # list instead of hashing names. Annotates the AST in place:
+    #   Identifier, BhaiStatement, Assignment, ForEachLoop: .slot and .local
+    #   FunctionDef: .param_slots, .local_names, .nlocals
+    #   IndexAssignment: .slot of the global holding the list, or None
+    #   FunctionCall: .builtin, or None when a kaam of that name exists
+    #
+    # Inside a kaam, parameters, `bhai` declarations and har_ek loop
+    # variables are locals. A plain assignment updates a global if the
+    # program's top level declares or assigns that name, otherwise it
+    # creates a local. Everything else reads from the globals.
+
+    def __init__(self, symbols, functions=()):
+        self.symbols = symbols
+        self.scope = None
+        # kaams defined by earlier programs (the REPL) or this one
+        self.kaams = set(functions)
+
+    def resolve(self, node):
+        method = self.resolvers.get(type(node))
+        if method is not None:
+            method(self, node)
+
+    def resolve_block(self, statements):
+        for stmt in statements:
+            self.resolve(stmt)
+
+    def resolve_program(self, node):
+        self.declare_kaams(node.statements)
+        self.declare_globals(node.statements)
+        self.resolve_block(node.statements)
+
+    def declare_kaams(self, statements):
+        for stmt in statements:
+            if isinstance(stmt, FunctionDef):
+                self.kaams.add(stmt.name)
+                self.declare_kaams(stmt.body)
+            elif isinstance(stmt, IfStatement):
+                self.declare_kaams(stmt.then_block)
+                if stmt.else_block:
+                    self.declare_kaams(stmt.else_block)
+            elif isinstance(stmt, (WhileLoop, ForEachLoop)):
+                self.declare_kaams(stmt.body)
+
+    def declare_globals(self, statements):
+        for stmt in statements:
+            if isinstance(stmt, (BhaiStatement, Assignment)):
+                self.symbols.slot(stmt.name)
+                self.symbols.declared.add(stmt.name)
+            elif isinstance(stmt, IfStatement):
+                self.declare_globals(stmt.then_block)
+                if stmt.else_block:
+                    self.declare_globals(stmt.else_block)
+            elif isinstance(stmt, WhileLoop):
+                self.declare_globals(stmt.body)
+            elif isinstance(stmt, ForEachLoop):
+                self.symbols.slot(stmt.name)
+                self.symbols.declared.add(stmt.name)
+                self.declare_globals(stmt.body)
+
+    def declare_locals(self, statements, scope):
+        for stmt in statements:
+            if isinstance(stmt, BhaiStatement):
+                scope.slot(stmt.name)
+            elif isinstance(stmt, Assignment):
+                if stmt.name not in self.symbols.declared:
+                    scope.slot(stmt.name)
+            elif isinstance(stmt, IfStatement):
+                self.declare_locals(stmt.then_block, scope)
+                if stmt.else_block:
+                    self.declare_locals(stmt.else_block, scope)
+            elif isinstance(stmt, WhileLoop):
+                self.declare_locals(stmt.body, scope)
+            elif isinstance(stmt, ForEachLoop):
+                scope.slot(stmt.name)
+                self.declare_locals(stmt.body, scope)
+
+    def bind(self, node):
+        scope = self.scope
+        if scope is not None and node.name in scope.index:
+            node.local = True
+            node.slot = scope.index[node.name]
+        else:
+            node.local = False
+            node.slot = self.symbols.slot(node.name)
+
+    def resolve_assignment(self, node):
+        self.resolve(node.value)
+        self.bind(node)
+
+    def resolve_bol(self, node):
+        self.resolve(node.expression)
+
+    def resolve_if(self, node):
+        self.resolve(node.condition)
+        self.resolve_block(node.then_block)
+        if node.else_block:
+            self.resolve_block(node.else_block)
+
+    def resolve_while(self, node):
+        self.resolve(node.condition)
+        self.resolve_block(node.body)
+
+    def resolve_for(self, node):
+        self.resolve(node.iterable)
+        self.bind(node)
+        self.resolve_block(node.body)
+
+    def resolve_function_def(self, node):
+        scope = SymbolTable()
+        node.param_slots = [scope.slot(param) for param in node.params]
+        self.declare_locals(node.body, scope)
+        node.local_names = scope.names
+        node.nlocals = len(scope)
+
+        saved = self.scope
+        self.scope = scope
+        self.resolve_block(node.body)
+        self.scope = saved
+
+    def resolve_return(self, node):
+        self.resolve(node.value)
+
+    def resolve_identifier(self, node):
+        self.bind(node)
+
+    def resolve_binary(self, node):
+        self.resolve(node.left)
+        self.resolve(node.right)
+
+    def resolve_unary(self, node):
+        self.resolve(node.operand)
+
+    def resolve_call(self, node):
+        self.resolve_block(node.args)
+        node.builtin = None if node.name in self.kaams else BUILTINS.get(node.name)
+
+    def resolve_list(self, node):
+        self.resolve_block(node.elements)
+
+    def resolve_index(self, node):
+        self.resolve(node.target)
+        self.resolve(node.index)
+
+    def resolve_slice(self, node):
+        self.resolve(node.target)
+        self.resolve(node.start)
+        self.resolve(node.stop)
+
+    def resolve_index_assignment(self, node):
+        self.resolve(node.target)
+        self.resolve(node.index)
+        self.resolve(node.value)
+        # yaad_rakh kaams may not change a global list either
+        root = node.target
+        while isinstance(root, Index):
+            root = root.target
+        node.slot = root.slot if isinstance(root, Identifier) and not root.local else None
+
+    resolvers = {
+        Program: resolve_program,
+        BhaiStatement: resolve_assignment,
+        Assignment: resolve_assignment,
+        BolStatement: resolve_bol,
+        IfStatement: resolve_if,
+        WhileLoop: resolve_while,
+        ForEachLoop: resolve_for,
+        FunctionDef: resolve_function_def,
+        Return: resolve_return,
+        Identifier: resolve_identifier,
+        BinaryOp: resolve_binary,
+        UnaryOp: resolve_unary,
+        FunctionCall: resolve_call,
+        ListLiteral: resolve_list,
+        Index: resolve_index,
+        Slice: resolve_slice,
+        IndexAssignment: resolve_index_assignment,
+    }
@@ -0,0 +1,197 @@
+import operator
+import sys
+from values import BhaiRange, BhaiList, Rope, make_list, text
+from vector import int_dot, int_extreme, int_sum
+
+# Any number of arguments
+VARIADIC = sys.maxsize
+
+# What [i], [a:b] and lambai() work on
+SEQUENCES = (BhaiList, list, BhaiRange, str, Rope)
+LISTS = (BhaiList, list, BhaiRange)
+
+class Builtin:
+    __slots__ = ('name', 'function', 'min_args', 'max_args')
+
+    def __init__(self, name, function, min_args, max_args):
+        self.name = name
+        self.function = function
+        self.min_args = min_args
+        self.max_args = max_args
+
+    def __repr__(self):
+        return f"Builtin({self.name})"
+
+    def arity(self):
+        if self.min_args == self.max_args:
+            return f"{self.min_args}"
+        if self.max_args == VARIADIC:
+            return f"kam se kam {self.min_args}"
+        return f"{self.min_args} se {self.max_args}"
+
+# Every builtin by name. The resolver looks each call site up here once;
+# a kaam with the same name in the program wins over the builtin.
+BUILTINS = {}
+
+def builtin(name, min_args=1, max_args=None):
+    # Registers function(interpreter, *args) as a builtin for programs
+    # compiled from now on. The interpreter comes first so a builtin can
+    # report errors with interpreter.error(...) like the rest of Bhai.
+    #
+    #     @bhai.builtin('discount', 2)
+    #     def discount(interpreter, price, percent):
+    #         return price * (100 - percent) / 100
+    def register(function):
+        BUILTINS[name] = Builtin(name, function, min_args,
+                                 min_args if max_args is None else max_args)
+        return function
+    return register
+
+def items(interpreter, name, value):
+    # The Python sequence behind a list or range argument
+    if not isinstance(value, LISTS):
+        interpreter.error(f'{name} ko list ya range chahiye, {type(text(value)).__name__} nahi! 📋')
+    return value.items if value.__class__ is BhaiList else value
+
+def sized(interpreter, value):
+    # Ranges are lazy; check one before it is turned into a list or string
+    if isinstance(value, BhaiRange):
+        interpreter.check_size(value)
+    return value
+
+def checked(interpreter, result):
+    if len(result) > interpreter.size_limit:
+        interpreter.check_size(result)
+    return result
+
+@builtin('range', 1, 3)
+def bhai_range(interpreter, *args):
+    return BhaiRange(*[int(arg) for arg in args])
+
+@builtin('len')
+@builtin('lambai')
+def length(interpreter, value):
+    if not isinstance(value, SEQUENCES):
+        interpreter.error(f'lambai sirf list, range ya string ki hoti hai, '
+                          f'{type(value).__name__} ki nahi! 📏')
+    return len(value)
+
+@builtin('format', 1, VARIADIC)
+def format_text(interpreter, template, *values):
+    # format("{} ne {} run banaye", naam, runs): the line is joined once
+    # instead of building a string per jod
+    if not isinstance(template, (str, Rope)):
+        interpreter.error(f'format ka pehla argument string hona chahiye, '
+                          f'{type(template).__name__} nahi! 📝')
+    pieces = str(template).split('{}')
+    if len(pieces) != len(values) + 1:
+        interpreter.error(f'format mein {len(pieces) - 1} {{}} hain par {len(values)} '
+                          f'values di! Count toh sahi karo! 🔢')
+    parts = [pieces[0]]
+    used = len(pieces[0])
+    for value, piece in zip(values, pieces[1:]):
+        part = interpreter.render(value, used)
+        parts.append(part)
+        parts.append(piece)
+        used += len(part) + len(piece)
+    return checked(interpreter, ''.join(parts))
+
+@builtin('str')
+def to_text(interpreter, value):
+    # The same text bol would print
+    return interpreter.render(value)
+
+@builtin('int')
+def to_int(interpreter, value):
+    try:
+        return int(text(value))
+    except (TypeError, ValueError, OverflowError):
+        interpreter.error(f'{text(value)!r} ko integer nahi bana sakte bhai! 🔢')
+
+@builtin('abs')
+def absolute(interpreter, value):
+    if value.__class__ not in (int, float):
+        interpreter.error(f'abs sirf numbers ka hota hai, {text(value)!r} ka nahi! 🔢')
+    return abs(value)
+
+@builtin('sum')
+def total(interpreter, values):
+    if isinstance(values, BhaiRange):
+        # n terms from first to last: no need to walk it
+        values = values.range
+        return len(values) * (values[0] + values[-1]) // 2 if values else 0
+    values = items(interpreter, 'sum', values)
+    result = int_sum(values)
+    if result is not None:
+        return result
+    try:
+        return sum(values)
+    except TypeError:
+        interpreter.error("sum sirf numbers ki list ka hota hai bhai! ➕")
+
+def extreme(interpreter, name, pick, values):
+    if len(values) == 1:
+        values = values[0]
+        if not isinstance(values, SEQUENCES):
+            interpreter.error(f'{name} ko ek list do, ya do se zyada values! 📋')
+    if not len(values):
+        interpreter.error(f'Khali list ka {name} kaise nikalein bhai? 🤷‍♂️')
+    if isinstance(values, BhaiRange):
+        values = values.range
+        return pick(values[0], values[-1])
+    if values.__class__ is BhaiList:
+        values = values.items
+        result = int_extreme(values, pick)
+        if result is not None:
+            return result
+    try:
+        return pick(values)
+    except TypeError:
+        interpreter.error(f'{name} ke liye numbers aur strings mix nahi kar sakte! 🍎🍊')
+
+@builtin('min', 1, VARIADIC)
+def smallest(interpreter, *values):
+    return extreme(interpreter, 'min', min, values)
+
+@builtin('max', 1, VARIADIC)
+def largest(interpreter, *values):
+    return extreme(interpreter, 'max', max, values)
+
+@builtin('dot', 2)
+def dot_product(interpreter, left, right):
+    # sum(a[i] * b[i]) without building the products as a list
+    left = items(interpreter, 'dot', sized(interpreter, left))
+    right = items(interpreter, 'dot', sized(interpreter, right))
+    if len(left) != len(right):
+        interpreter.error(f'dot ke liye dono lists ki lambai same honi chahiye, '
+                          f'{len(left)} aur {len(right)} nahi! 📏')
+    result = int_dot(left, right)
+    if result is not None:
+        return result
+    try:
+        return sum(map(operator.mul, left, right))
+    except TypeError:
+        interpreter.error("dot sirf numbers ki lists ka hota hai bhai! ✖️")
+
+@builtin('sort')
+def sort_list(interpreter, values):
+    # A new sorted list; the one passed in is left alone
+    values = items(interpreter, 'sort', sized(interpreter, values))
+    try:
+        return make_list(sorted(values))
+    except TypeError:
+        interpreter.error("sort ke liye numbers aur strings mix nahi kar sakte! 🍎🍊")
+
+@builtin('join', 1, 2)
+def join_text(interpreter, values, separator=""):
+    values = items(interpreter, 'join', sized(interpreter, values))
+    if not isinstance(separator, (str, Rope)):
+        interpreter.error(f'join ka separator string hona chahiye, {separator!r} nahi! 📝')
+    separator = str(separator)
+    parts = []
+    used = 0
+    for value in values:
+        part = interpreter.render(value, used)
+        parts.append(part)
+        used += len(part) + len(separator)
+    return checked(interpreter, separator.join(parts))
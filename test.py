@@ -1,6 +1,27 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
 from tokenizer import Tokenizer
-from parser import Parser
+from parser import Parser, BhaiStatement, BolStatement, Break, Number, String
 from interpreter import BhaiInterpreter
+from vm import BhaiVM
+from optimizer import optimize
+from output import BufferedOutput
+from cache import ProgramCache, CACHE_DIR, source_key
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples')
+
+def run_code(code, interpreter_class=BhaiInterpreter):
+    tokens = Tokenizer(code).tokenize()
+    ast = Parser(tokens).parse()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            interpreter_class().execute(ast)
+        except RuntimeError as e:
+            print(f"RuntimeError: {e}")
+    return output.getvalue()
 
 def test_basic():
     print("Testing basic operations...")
@@ -105,6 +126,1291 @@ def test_errors():
     except RuntimeError as e:
         print(f"✅ Undefined variable caught: {e}")
 
+def test_vm_matches_tree_walker():
+    print("\nTesting bytecode VM against the tree-walker...")
+
+    programs = [
+        '''
+        bhai i = 0;
+        bhai s = 0;
+        jab_tak (i chota 50) {
+            s = jod(s, guna(i, 2));
+            i = jod(i, 1);
+        }
+        bhai bol(s);
+        bhai bol(bhag_kar(7, 2));
+        bhai bol(-s);
+        bhai bol(jod("s = ", s));
+        bhai bol([1, jod(1, 1), "teen"]);
+        bhai bol(range(2, 10, 3));
+        ''',
+        '''
+        kaam fib(n) {
+            agar (n chota 2) {
+                wapas n;
+            }
+            wapas jod(fib(ghata(n, 1)), fib(ghata(n, 2)));
+        }
+        bhai bol(fib(12));
+        ''',
+        '''
+        bhai x = 10;
+        agar (x bada 20) {
+            bhai bol("bada");
+        } nahi_toh agar (x barabar 10) {
+            bhai bol("barabar");
+        } nahi_toh {
+            bhai bol("chota");
+        }
+        ''',
+        '''
+        bhai i = 0;
+        jab_tak (sahi) {
+            i = jod(i, 1);
+            agar (i bada 3) {
+                bas_kar;
+            }
+            agar (i bada 5) {
+                wapas i;
+            }
+        }
+        bhai bol(i);
+        wapas 0;
+        bhai bol("never");
+        ''',
+        '''
+        kaam f(a) {
+            bhai b = guna(a, 2);
+            wapas b;
+        }
+        bhai b = 1;
+        bhai bol(f(5));
+        bhai bol(b);
+        kaam nothing() {
+            bhai bol("andar");
+        }
+        bhai bol(nothing());
+        ''',
+        'bhai bol(bhag_kar(10, 0));',
+        'bhai bol(undefined_var);',
+        'bhai bol(ghata("a", 1));',
+        'missing(undefined_var);',
+        'kaam f(a) { wapas a; } f(1, 2);',
+    ]
+
+    for code in programs:
+        expected = run_code(code, BhaiInterpreter)
+        actual = run_code(code, BhaiVM)
+        assert actual == expected, f"VM output differs:\n{actual}\n!=\n{expected}"
+    print("✅ VM matches the tree-walker!")
+
+def test_slot_resolution():
+    print("\nTesting variable slots...")
+
+    code = '''
+    bhai x = 1;
+    kaam f(a) {
+        wapas jod(a, x);
+    }
+    bhai y = f(2);
+    '''
+
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        interpreter = interpreter_class()
+        interpreter.execute(Parser(Tokenizer(code).tokenize()).parse())
+        assert interpreter.symbols.names == ['x', 'y']
+        assert interpreter.variables == {'x': 1, 'y': 3}
+
+        # Slots persist across programs, like the REPL does
+        interpreter.execute(Parser(Tokenizer('bhai z = jod(y, x);').tokenize()).parse())
+        assert interpreter.variables['z'] == 4
+
+        output = run_code('bhai bol(a);', interpreter_class)
+        assert 'Variable "a" ko pehle define karo bhai!' in output
+
+        # Only a top-level declaration makes y global; a kaam reading it
+        # first doesn't, so definition order can't change the meaning
+        reader = 'kaam a() { wapas y; } '
+        writer = 'kaam b() { y = 5; wapas y; } '
+        for program in (reader + writer, writer + reader):
+            output = run_code(program + 'bhai bol(b()); bhai bol(a());', interpreter_class)
+            assert output.startswith('5\n') and 'Variable "y" ko pehle define karo' in output
+    print("✅ Variable slots working!")
+
+def test_call_frames():
+    print("\nTesting call frames...")
+
+    code = '''
+    bhai count = 0;
+    bhai naam = "global";
+    kaam badhao(n) {
+        bhai naam = "local";
+        count = jod(count, n);
+        wapas naam;
+    }
+    bhai bol(badhao(5));
+    bhai bol(badhao(2));
+    bhai bol(count);
+    bhai bol(naam);
+
+    kaam andar() {
+        wapas chhupa;
+    }
+    kaam bahar() {
+        bhai chhupa = 1;
+        wapas andar();
+    }
+    bhai bol(bahar());
+    '''
+
+    expected = ("local\nlocal\n7\nglobal\n"
+                "RuntimeError: ❌ Runtime Error: Variable \"chhupa\" ko pehle define karo bhai! ")
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        assert run_code(code, interpreter_class).startswith(expected)
+
+    code = '''
+    kaam gehra(n) {
+        wapas jod(gehra(jod(n, 1)), 1);
+    }
+    gehra(0);
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = run_code(code, interpreter_class)
+        assert 'Itni gehri recursion?' in output, output
+
+        interpreter = interpreter_class(max_depth=20)
+        try:
+            interpreter.execute(Parser(Tokenizer(code).tokenize()).parse())
+        except RuntimeError as e:
+            assert '20 calls se aage nahi jaa sakte' in str(e)
+        assert interpreter.frames == []
+    print("✅ Call frames working!")
+
+def test_fast_tokenizer():
+    print("\nTesting regex tokenizer against the reference scanner...")
+
+    def scan(method, code):
+        try:
+            return [(t.type, t.value, t.line, t.column) for t in method(Tokenizer(code))]
+        except Exception as e:
+            return (type(e), str(e))
+
+    samples = [
+        'bhai x = 10; // comment\nbhai bol(jod(x, 2.5));',
+        'agar (x == 1) { bhai bol("a\\tb\\"c\\n"); } nahi_toh { }',
+        "bhai s = 'multi\nline';\nbhai bol(s);",
+        'bhai naam = "bhai 🇮🇳"; bhai é = 1; bhai y = 1٣;',
+        '1.2.3',
+        'bhai bol("khula',
+        'bhai x = 5 @ 3;',
+        '// sirf comment',
+    ]
+    for name in ('calculator', 'fibonacci', 'fizzbuzz', 'greet', 'hello'):
+        with open(os.path.join(EXAMPLES, f'{name}.bhai'), encoding='utf-8') as f:
+            samples.append(f.read())
+
+    for code in samples:
+        assert scan(Tokenizer.tokenize, code) == scan(Tokenizer.tokenize_chars, code), code
+    print("✅ Regex tokenizer matches!")
+
+def test_streaming_tokenizer():
+    print("\nTesting streaming tokenizer...")
+
+    with open(os.path.join(EXAMPLES, 'fizzbuzz.bhai'), encoding='utf-8') as f:
+        code = f.read()
+    code += 'bhai s = "do\nline"; bhai bol(s); // khatam'
+
+    expected = [(t.type, t.value, t.line, t.column) for t in Tokenizer(code).tokenize()]
+    one_char = [(t.type, t.value, t.line, t.column) for t in Tokenizer().stream(code)]
+    by_line = [(t.type, t.value, t.line, t.column)
+               for t in Tokenizer().stream(io.StringIO(code))]
+    assert one_char == expected
+    assert by_line == expected
+
+    # The parser pulls tokens lazily, so a long stream is never materialised
+    def lines(count):
+        for i in range(count):
+            yield f'bhai x{i % 10} = jod({i}, 1);\n'
+
+    seen = []
+    def counting(tokens):
+        for token in tokens:
+            seen.append(token.type)
+            yield token
+
+    parser = Parser(counting(Tokenizer().stream(lines(1000))))
+    first = parser.parse_statement()
+    assert isinstance(first, BhaiStatement)
+    assert len(seen) < 20
+    program = parser.parse()
+    assert len(program.statements) == 999
+    print("✅ Streaming tokenizer working!")
+
+def test_program_cache():
+    print("\nTesting program cache...")
+
+    with tempfile.TemporaryDirectory() as root:
+        script = os.path.join(root, 'demo.bhai')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write('bhai x = 4;\nbhai bol(guna(x, 2));\n')
+
+        cache = ProgramCache()
+        first = cache.parse_file(script)
+        entry = cache.cache_path(script)
+        assert os.path.dirname(entry) == os.path.join(root, CACHE_DIR)
+        assert os.path.exists(entry)
+
+        with open(script, encoding='utf-8') as f:
+            key = source_key(f.read())
+        assert cache.load(script, key) is not None
+        second = cache.parse_file(script)
+        assert len(second.statements) == len(first.statements)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            BhaiVM().execute(second)
+        assert output.getvalue() == "8\n"
+
+        # Editing the script changes the key, so the old entry is ignored
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write('bhai bol("naya");\n')
+        assert cache.parse_file(script).statements[0].expression.value == "naya"
+
+        # A damaged entry is a miss, not a crash
+        with open(entry, 'wb') as f:
+            f.write(b'BHAIC\ngarbage')
+        assert cache.load(script, key) is None
+        assert cache.parse_file(script).statements[0].expression.value == "naya"
+
+        # Entries are data, never code: a planted pickle or a class that
+        # isn't part of the AST is just a miss
+        import pickle
+        key = source_key('bhai bol("naya");\n')
+        for payload in (pickle.dumps(os.getcwd), b'{"@":"Tokenizer","source":"x"}',
+                        b'{"@":"Program","statements":[],"__class__":1}'):
+            with open(entry, 'wb') as f:
+                f.write(b'BHAIC\n' + key.encode('ascii') + b'\n' + payload)
+            assert cache.load(script, key) is None
+
+        assert cache.clear(script)
+        assert not os.path.exists(os.path.join(root, CACHE_DIR))
+        assert not cache.clear(root)
+    print("✅ Program cache working!")
+
+def test_optimizer():
+    print("\nTesting optimizer...")
+
+    def optimized(code):
+        return optimize(Parser(Tokenizer(code).tokenize()).parse()).statements
+
+    folded = optimized('bhai bol(jod(2, guna(3, 4))); bhai bol("a" + 1);')
+    assert isinstance(folded[0].expression, Number) and folded[0].expression.value == 14
+    assert isinstance(folded[1].expression, String) and folded[1].expression.value == "a1"
+
+    pruned = optimized('agar (sahi) { bhai bol(1); } nahi_toh { bhai bol(2); } agar (galat) { bhai bol(3); }')
+    assert len(pruned) == 1 and isinstance(pruned[0], BolStatement)
+
+    # Errors are left for runtime
+    kept = optimized('bhai bol(bhag_kar(1, 0)); bhai bol(ghata("a", 1));')
+    assert not isinstance(kept[0].expression, Number)
+    assert not isinstance(kept[1].expression, Number)
+
+    function = optimized('kaam f() { wapas 1; bhai bol("dead"); }')[0]
+    assert len(function.body) == 1
+
+    loop = optimized('jab_tak (sahi) { agar (sahi) { bas_kar; bhai bol(1); } bhai bol(2); }')[0]
+    assert len(loop.body) == 1 and isinstance(loop.body[0], Break)
+
+    programs = [
+        'bhai bol(jod(2, 3)); bhai bol(bhag_kar(1, 0));',
+        'agar (sahi) { wapas 1; bhai bol("hidden"); } bhai bol("after");',
+        'bhai i = 0; jab_tak (i chota 3) { agar (sahi) { bas_kar; } bhai bol(i); i = i + 1; }',
+        'bhai x = 5; kaam f() { bhai bol(x); agar (galat) { bhai x = 1; } wapas 0; } f();',
+        'kaam f() { agar (1 bada 0) { wapas "haan"; } bhai bol("dead"); } bhai bol(f());',
+        # Dead top-level code still decides what is global and what is a kaam
+        'kaam f() { x = 5; wapas x; } agar (galat) { bhai x = 0; } f(); bhai bol(x);',
+        'agar (galat) { kaam sum(a) { wapas 0; } } bhai bol(sum([1, 2]));',
+    ]
+    for code in programs:
+        for interpreter_class in (BhaiInterpreter, BhaiVM):
+            expected = run_code(code, interpreter_class)
+            output = io.StringIO()
+            with redirect_stdout(output):
+                try:
+                    interpreter_class().execute(optimize(Parser(Tokenizer(code).tokenize()).parse()))
+                except RuntimeError as e:
+                    print(f"RuntimeError: {e}")
+            assert output.getvalue() == expected, code
+    print("✅ Optimizer working!")
+
+def test_lazy_range():
+    print("\nTesting lazy range...")
+
+    from values import BhaiRange
+    assert run_code('bhai bol(range(5));') == "[0, 1, 2, 3, 4]\n"
+    assert run_code('bhai bol(range(2, 10, 3));', BhaiVM) == "[2, 5, 8]\n"
+    assert run_code('bhai bol(range(0));') == "[]\n"
+    assert run_code('bhai bol(range(3) barabar [0, 1, 2]);') == "1\n"
+    assert run_code('bhai bol(range(2) + [5]);', BhaiVM) == "[0, 1, 5]\n"
+
+    huge = BhaiRange(10 ** 12)
+    assert len(huge) == 10 ** 12
+    assert huge[5] == 5 and huge[-1] == 10 ** 12 - 1
+    assert list(BhaiRange(1, 4)) == [1, 2, 3]
+
+    # Memory doesn't depend on the size of the range
+    interpreter = BhaiVM()
+    interpreter.execute(Parser(Tokenizer('bhai r = range(10000000);').tokenize()).parse())
+    assert isinstance(interpreter.variables['r'], BhaiRange)
+    print("✅ Lazy range working!")
+
+def test_buffered_output():
+    print("\nTesting buffered output...")
+
+    code = 'bhai i = 0; jab_tak (i chota 3) { bhai bol(i); i = i + 1; }'
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = BufferedOutput(io.StringIO())
+        interpreter_class(output=output).execute(Parser(Tokenizer(code).tokenize()).parse())
+        assert output.getvalue() == "0\n1\n2\n"
+
+    stream = io.StringIO()
+    output = BufferedOutput(stream, policy='program')
+    output.write_line("pehla")
+    assert stream.getvalue() == ""
+    output.flush()
+    assert stream.getvalue() == "pehla\n"
+
+    stream = io.StringIO()
+    output = BufferedOutput(stream, policy='size', size=10)
+    output.write_line("abc")
+    assert stream.getvalue() == ""
+    output.write_line("defghij")
+    assert stream.getvalue() == "abc\ndefghij\n"
+
+    stream = io.StringIO()
+    output = BufferedOutput(stream, policy='line')
+    output.write_line(7)
+    assert stream.getvalue() == "7\n"
+
+    # Whatever was printed before a runtime error still comes out
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        stream = io.StringIO()
+        interpreter = interpreter_class(output=BufferedOutput(stream, policy='program'))
+        try:
+            interpreter.execute(Parser(Tokenizer('bhai bol("pehle"); bhai bol(x);').tokenize()).parse())
+            assert False, "expected a RuntimeError"
+        except RuntimeError:
+            pass
+        assert stream.getvalue() == "pehle\n"
+    print("✅ Buffered output working!")
+
+def test_for_each():
+    print("\nTesting har_ek loops...")
+
+    code = '''
+    har_ek item in [1, 2, 3] {
+        bhai bol(item);
+    }
+    har_ek c in "bhai" {
+        agar (c barabar "a") {
+            aage_badh;
+        }
+        bhai bol(c);
+    }
+    kaam total(xs) {
+        bhai sum = 0;
+        har_ek x in xs {
+            agar (x bada 3) {
+                wapas sum;
+            }
+            sum = sum + x;
+        }
+        wapas sum;
+    }
+    bhai bol(total(range(10)));
+    har_ek i in range(100000000) {
+        bas_kar;
+    }
+    bhai bol(i);
+    '''
+    expected = "1\n2\n3\nb\nh\ni\n6\n0\n"
+    assert run_code(code) == expected
+    assert run_code(code, BhaiVM) == expected
+
+    assert "list, range ya string" in run_code('har_ek x in 5 { bhai bol(x); }', BhaiVM)
+    assert "list, range ya string" in run_code('har_ek x in 5 { bhai bol(x); }')
+
+    for code in ('aage_badh;', 'jab_tak (sahi) { kaam f() { aage_badh; } }'):
+        try:
+            Parser(Tokenizer(code).tokenize()).parse()
+            assert False, "expected a SyntaxError"
+        except SyntaxError as e:
+            assert "aage_badh" in str(e)
+    print("✅ har_ek loops working!")
+
+def test_control_flow():
+    print("\nTesting bas_kar, aage_badh and wapas...")
+
+    code = '''
+    bhai i = 0;
+    jab_tak (sahi) {
+        i = jod(i, 1);
+        agar (i barabar 2) {
+            aage_badh;
+        }
+        agar (i bada 4) {
+            bas_kar;
+        }
+        bhai bol(i);
+    }
+    kaam pehla_bada(xs, limit) {
+        har_ek x in xs {
+            har_ek y in [1, 2] {
+                agar (y barabar 2) {
+                    bas_kar;
+                }
+                agar (x bada limit) {
+                    wapas x;
+                }
+            }
+        }
+        wapas -1;
+    }
+    bhai bol(pehla_bada([1, 5, 9], 4));
+    wapas "khatam";
+    bhai bol("never");
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            result = interpreter_class().execute(Parser(Tokenizer(code).tokenize()).parse())
+        assert output.getvalue() == "1\n3\n4\n5\n", interpreter_class
+        assert result == "khatam"
+
+    for code in ('bas_kar;', 'agar (sahi) { bas_kar; }', 'jab_tak (sahi) { kaam f() { bas_kar; } }'):
+        try:
+            Parser(Tokenizer(code).tokenize()).parse()
+            assert False, "expected a SyntaxError"
+        except SyntaxError as e:
+            assert "bas_kar" in str(e)
+    print("✅ Control flow working!")
+
+def test_bench():
+    print("\nTesting benchmark runner...")
+
+    import bench
+    workloads = [('chhota', 'bhai x = jod(1, 2); bhai bol(x);')]
+    report = bench.run_suite(workloads, BhaiVM, warmup=0, repeat=2)
+    assert [r['phase'] for r in report['results']] == list(bench.PHASES)
+    for r in report['results']:
+        assert r['workload'] == 'chhota' and r['runs'] == 2
+        assert r['best'] <= r['median']
+    assert report['results'][0]['tokens_per_sec'] > 0
+
+    names = [name for name, source in bench.default_workloads()]
+    assert {'fib', 'loop', 'strings', 'lists', 'large_parse'} <= set(names)
+
+    slower = {'results': [dict(r, median=r['median'] * 2) for r in report['results']]}
+    with redirect_stdout(io.StringIO()):
+        assert bench.compare(slower, report) == [('chhota', phase) for phase in bench.PHASES]
+        assert bench.compare(report, report) == []
+    print("✅ Benchmark runner working!")
+
+def test_profiler():
+    print("\nTesting source positions and profiler...")
+
+    from profiler import ProfilingInterpreter
+
+    code = '''kaam sq(n) {
+    wapas guna(n, n);
+}
+bhai total = 0;
+har_ek i in range(3) {
+    total = jod(total, sq(i));
+}
+bhai bol(total);
+'''
+    program = Parser(Tokenizer(code).tokenize()).parse()
+    function, declaration, loop, bol = program.statements
+    assert [s.line for s in program.statements] == [1, 4, 5, 8]
+    assert (loop.body[0].line, loop.body[0].column) == (6, 5)
+    assert (function.body[0].value.line, function.body[0].value.column) == (2, 11)
+    folded = optimize(Parser(Tokenizer('\n  bhai bol(jod(1, 2));').tokenize()).parse())
+    assert (folded.statements[0].expression.line, folded.statements[0].expression.column) == (2, 12)
+
+    ticks = iter(range(10 ** 6))
+    output = BufferedOutput(io.StringIO())
+    profiler = ProfilingInterpreter(output=output, clock=lambda: next(ticks))
+    profiler.execute(program)
+    assert output.getvalue() == "5\n"
+
+    counts = {stats.node.line: stats.count for stats in profiler.hot_statements()}
+    assert counts == {1: 1, 2: 3, 4: 1, 5: 1, 6: 3, 8: 1}
+    assert profiler.hot_statements(1)[0].node is loop
+    sq = profiler.function_stats['sq']
+    assert sq.calls == 3 and sq.cumulative > 0 and sq.self_time == sq.cumulative
+
+    stacks = dict(line.rsplit(' ', 1) for line in profiler.folded_lines())
+    assert set(stacks) == {'<program>', '<program>;sq'}
+
+    report = io.StringIO()
+    profiler.report(code, file=report)
+    assert "total = jod(total, sq(i));" in report.getvalue()
+
+    # Every hop of a tail call counts as a call to the kaam it reaches
+    code = '''
+    kaam helper(n) { wapas n; }
+    kaam loop(n) {
+        agar (n barabar 0) { wapas helper(n); }
+        wapas loop(ghata(n, 1));
+    }
+    bhai bol(loop(50));
+    '''
+    profiler = ProfilingInterpreter(output=BufferedOutput(io.StringIO()))
+    profiler.execute(Parser(Tokenizer(code).tokenize()).parse())
+    assert profiler.function_stats['loop'].calls == 51
+    assert profiler.function_stats['helper'].calls == 1
+    stacks = dict(line.rsplit(' ', 1) for line in profiler.folded_lines())
+    assert set(stacks) == {'<program>', '<program>;loop', '<program>;helper'}
+    print("✅ Profiler working!")
+
+def test_memoization():
+    print("\nTesting yaad_rakh memoization...")
+
+    code = '''
+    yaad_rakh kaam fib(n) {
+        agar (n chota 2) {
+            wapas n;
+        }
+        wapas jod(fib(ghata(n, 1)), fib(ghata(n, 2)));
+    }
+    bhai bol(fib(80));
+    yaad_rakh(2) kaam sq(n) {
+        wapas guna(n, n);
+    }
+    bhai bol([sq(1), sq(2), sq(1), sq(3), sq(2), sq(1.0)]);
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = BufferedOutput(io.StringIO())
+        interpreter = interpreter_class(output=output)
+        interpreter.execute(Parser(Tokenizer(code).tokenize()).parse())
+        assert output.getvalue() == "23416728348467685\n[1, 4, 1, 9, 4, 1.0]\n"
+
+        info = interpreter.memo_info()
+        assert info['fib'] == {'hits': 78, 'misses': 81, 'size': 81, 'maxsize': 1024}
+        # sq(1) hits once; sq(2) was evicted by sq(3); sq(1.0) is its own key
+        assert info['sq'] == {'hits': 1, 'misses': 5, 'size': 2, 'maxsize': 2}
+
+    impure = '''
+    bhai count = 0;
+    kaam badha() {
+        count = jod(count, 1);
+        wapas count;
+    }
+    yaad_rakh kaam ganda(n) {
+        wapas badha();
+    }
+    bhai bol(ganda(1));
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = run_code(impure, interpreter_class)
+        assert 'yaad_rakh kaam "ganda" global variable "count"' in output
+
+    # A cached list can't be changed through a result handed out earlier
+    code = '''
+    yaad_rakh kaam pair(n) {
+        wapas [n, [1]];
+    }
+    bhai a = pair(1);
+    a[0] = 99;
+    a[1][0] = 99;
+    bhai bol(pair(1));
+    bhai b = pair(1);
+    b[1][0] = 7;
+    bhai bol(pair(1));
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        assert run_code(code, interpreter_class) == "[1, [1]]\n[1, [1]]\n"
+
+    # Changing a global list through another name is caught too, after the
+    # target, index and value are evaluated in both engines
+    code = '''
+    bhai xs = [1, 2];
+    kaam note() {
+        bhai bol("evaluated");
+        wapas 0;
+    }
+    yaad_rakh kaam chupke(n) {
+        bhai ys = xs;
+        ys[note()] = n;
+        wapas n;
+    }
+    bhai bol(chupke(5));
+    '''
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        output = run_code(code, interpreter_class)
+        assert output.startswith('evaluated\n')
+        assert 'yaad_rakh kaam "chupke" global variable "xs"' in output
+
+    try:
+        Parser(Tokenizer('yaad_rakh bhai x = 1;').tokenize()).parse()
+        assert False, "expected a SyntaxError"
+    except SyntaxError as e:
+        assert "yaad_rakh" in str(e)
+    print("✅ Memoization working!")
+
+def test_embed_api():
+    print("\nTesting embedding API...")
+
+    import bhai
+    from concurrent.futures import ThreadPoolExecutor
+
+    source = '''
+    kaam grade(score) {
+        agar (score bada 89) {
+            wapas "A";
+        } nahi_toh agar (score bada 59) {
+            wapas "B";
+        }
+        wapas "C";
+    }
+    bhai bol(jod("checking ", naam));
+    wapas grade(score);
+    '''
+    for engine in ('vm', 'tree'):
+        rule = bhai.compile(source, engine=engine)
+        output = io.StringIO()
+        assert rule.run(globals={'score': 95, 'naam': 'Asha'}, output=output) == "A"
+        assert rule.run(globals={'score': 70, 'naam': 'Ravi', 'unused': 1}, output=output) == "B"
+        assert output.getvalue() == "checking Asha\nchecking Ravi\n"
+
+        # Nothing leaks from one run into the next
+        try:
+            rule.run(globals={'naam': 'x'}, output=io.StringIO())
+            assert False, "expected a RuntimeError"
+        except RuntimeError as e:
+            assert '"score"' in str(e)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            grades = list(pool.map(lambda s: rule.run({'score': s, 'naam': ''}, io.StringIO()),
+                                   range(0, 100, 5)))
+        assert grades == ["C"] * 12 + ["B"] * 6 + ["A"] * 2
+
+    assert bhai.compile('bhai x = 1;').run() is None
+
+    # Lists, ranges and long strings come back as plain Python values
+    source = 'bhai xs = [1, 2.5]; xs[0] = xs; wapas [range(3), xs, format("{}", "a" * 300) + "!"];'
+    source = source.replace('"a" * 300', '"' + 'a' * 300 + '"')
+    for engine in ('vm', 'tree'):
+        numbers, nested, line = bhai.compile(source, engine).run()
+        assert type(numbers) is list and numbers == [0, 1, 2]
+        assert type(nested) is list and nested[0] is nested and nested[1] == 2.5
+        assert type(line) is str and line == 'a' * 300 + '!'
+
+    # Python lists go in as copies, in normal and vector mode alike
+    for engine in ('vm', 'tree'):
+        xs = [1, 2, [3]]
+        assert bhai.compile('xs[0] = 9; xs[2][0] = 8; wapas xs;', engine).run({'xs': xs}) == [9, 2, [8]]
+        assert xs == [1, 2, [3]]
+        doubled = bhai.compile('wapas guna(xs, 2);', engine, vector=True)
+        assert doubled.run({'xs': [1, 2.5]}) == [2, 5.0]
+        assert doubled.run({'xs': (1, 2)}) == doubled.run({'xs': range(1, 3)}) == [2, 4]
+    try:
+        bhai.compile('bhai x = ;')
+        assert False, "expected a SyntaxError"
+    except SyntaxError:
+        pass
+    print("✅ Embedding API working!")
+
+def test_budgets():
+    print("\nTesting execution budgets...")
+
+    import bhai
+    from interpreter import BudgetExceeded
+
+    def exceeded(source, engine, **limits):
+        try:
+            bhai.compile(source, engine, **limits).run(output=io.StringIO())
+        except BudgetExceeded as e:
+            return e.kind
+        return None
+
+    for engine in ('vm', 'tree'):
+        forever = 'jab_tak (1) { }'
+        assert exceeded(forever, engine, max_steps=5000) == 'steps'
+        assert exceeded(forever, engine, max_seconds=0.05) == 'time'
+        assert exceeded('kaam f(n) { wapas f(n); } f(1);', engine, max_steps=100) == 'steps'
+        assert exceeded('bhai s = "ab"; jab_tak (1) { s = s + s; }', engine, max_size=1000) == 'size'
+        assert exceeded('bhai x = [1] + range(100000000);', engine, max_size=1000) == 'size'
+
+        # Shared elements make text far longer than the list; it is bounded
+        # while it is built, for bol, str, format and join alike
+        doubled = 'bhai a = [1]; bhai i = 0; jab_tak (i chota 40) { a = [a, a]; i = i + 1; } '
+        for use in ('bhai bol(a);', 'bhai s = str(a);', 'bhai s = format("{}", a);',
+                    'bhai s = join([a]);', 'bhai bol(range(100000000));'):
+            assert exceeded(doubled + use, engine, max_size=10000) == 'size'
+        assert exceeded(doubled + 'bhai bol(a);', engine, max_seconds=0.05) == 'time'
+        assert exceeded('bhai s = join(["ab", "cd"], "-"); bhai bol(format("{}!", s));',
+                        engine, max_size=6) is None
+        assert exceeded('bhai s = join(["ab", "cd", "e"], "-");', engine, max_size=6) == 'size'
+
+        # Exactly max_steps iterations are allowed
+        counter = 'bhai i = 0; jab_tak (i chota {n}) {{ i = jod(i, 1); }}'
+        assert exceeded(counter.format(n=10), engine, max_steps=10) is None
+        assert exceeded(counter.format(n=11), engine, max_steps=10) == 'steps'
+
+        # Both engines count one step per iteration (aage_badh included) and per call
+        code = '''
+        bhai i = 0;
+        jab_tak (i chota 10) {
+            i = jod(i, 1);
+            agar (i barabar 3) { aage_badh; }
+            agar (i barabar 8) { bas_kar; }
+        }
+        har_ek x in range(4) { }
+        kaam g() { wapas 1; }
+        g(); g();
+        '''
+        interpreter = bhai.ENGINES[engine](output=BufferedOutput(io.StringIO()))
+        interpreter.execute(Parser(Tokenizer(code).tokenize()).parse())
+        assert interpreter.steps_used == 7 + 4 + 2
+
+        # Still a RuntimeError, so existing handlers catch it
+        try:
+            bhai.compile(forever, engine, max_steps=10).run()
+            assert False, "expected a RuntimeError"
+        except RuntimeError as e:
+            assert 'budget' in str(e)
+    print("✅ Execution budgets working!")
+
+def test_run_many():
+    print("\nTesting run-many...")
+
+    from batch import find_scripts, run_many
+
+    with tempfile.TemporaryDirectory() as directory:
+        scripts = {
+            'a.bhai': 'bhai bol("same"); wapas 7;',
+            'b.bhai': 'bhai bol("same"); wapas 7;',
+            'c.bhai': 'bhai bol("same"); wapas 7;',
+            'sub/loop.bhai': 'jab_tak (1) { }',
+            'sub/undefined.bhai': 'bhai bol("pehle"); bhai bol(q);',
+            'sub/syntax.bhai': 'bhai x = ;',
+            'sub/number.bhai': 'bhai x = 1.2.3;',
+        }
+        for name, source in scripts.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+        manifest = os.path.join(directory, 'nightly.txt')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write('# tonight\nc.bhai\nmissing.bhai\n\nsub/undefined.bhai\n')
+
+        # A mistyped directory or manifest is reported like a missing script
+        typo = os.path.join(directory, 'nightly')
+        assert find_scripts([typo]) == [typo]
+        results, _ = run_many([typo], jobs=1, use_cache=False)
+        assert results[0]['status'] == 'missing'
+
+        found = find_scripts([manifest, directory])
+        assert [os.path.relpath(p, directory) for p in found] == [
+            'c.bhai', 'missing.bhai', os.path.join('sub', 'undefined.bhai'), 'a.bhai', 'b.bhai',
+            os.path.join('sub', 'loop.bhai'), os.path.join('sub', 'number.bhai'),
+            os.path.join('sub', 'syntax.bhai')]
+
+        for jobs in (1, 2):
+            results, unique = run_many(found, jobs=jobs, use_cache=False,
+                                       limits={'max_steps': 1000})
+            assert unique == 5
+            by_name = {os.path.basename(r['path']): r for r in results}
+            assert [r['path'] for r in results] == found
+            for name in ('a.bhai', 'b.bhai', 'c.bhai'):
+                assert by_name[name]['status'] == 'ok'
+                assert by_name[name]['output'] == "same\n"
+                assert by_name[name]['value'] == 7
+            assert by_name['missing.bhai']['status'] == 'missing'
+            assert by_name['undefined.bhai']['status'] == 'error'
+            assert by_name['undefined.bhai']['output'] == "pehle\n"
+            assert '"q"' in by_name['undefined.bhai']['error']
+            assert by_name['loop.bhai']['status'] == 'error'
+            assert 'budget' in by_name['loop.bhai']['error']
+            assert by_name['syntax.bhai']['status'] == 'syntax_error'
+            # An unexpected error while parsing is that script's crash only
+            assert by_name['number.bhai']['status'] == 'crash'
+            assert by_name['number.bhai']['error'].startswith('ValueError')
+    print("✅ run-many working!")
+
+def test_typed_arithmetic():
+    print("\nTesting specialized arithmetic...")
+
+    from cache import dumps, loads
+    from parser import BinaryOp
+
+    code = '''
+    kaam ghatao(a, b) {
+        wapas ghata(a, b);
+    }
+    kaam jodo(a, b) {
+        wapas a + b;
+    }
+    bhai bol(ghatao(5, 3));
+    bhai bol(ghatao(2.5, 1));
+    bhai bol(jodo(1, 2));
+    bhai bol(jodo("a", "b"));
+    bhai bol(jodo("a", 1));
+    bhai bol(jodo([1], [2]));
+    bhai bol(bhag_kar(guna(3, 4), 8));
+    bhai bol(ghatao("x", 1));
+    '''
+    ast = Parser(Tokenizer(code).tokenize()).parse()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            BhaiInterpreter().execute(ast)
+        except RuntimeError as e:
+            print(f"RuntimeError: {e}")
+    assert output.getvalue() == run_code(code, BhaiVM)
+    assert output.getvalue().startswith("2\n1.5\n3\nab\na1\n[1, 2]\n1.5\n")
+    assert "String se kya ghata rahe ho?" in output.getvalue()
+
+    # The subtraction saw numbers first, then fell back to the generic path
+    function = ast.statements[0]
+    assert function.body[0].value.handler is BhaiInterpreter.binary
+
+    # A site that only ever sees ints keeps its fast path
+    ast = Parser(Tokenizer('bhai i = 0; jab_tak (i chota 10) { i = i + 1; }').tokenize()).parse()
+    interpreter = BhaiInterpreter()
+    interpreter.execute(ast)
+    assert interpreter.variables['i'] == 10
+    loop = ast.statements[1]
+    assert loop.condition.handler is BhaiInterpreter.compare_lt
+    assert loop.body[0].value.handler is BhaiInterpreter.add_numbers
+
+    # Errors are the same whichever path reports them
+    for code in ('bhai bol(bhag_kar(1, 0));', 'bhai bol(guna("a", 2));', 'bhai bol(ghata(1, "a"));'):
+        assert run_code(code) == run_code(code, BhaiVM)
+
+    # Specialized nodes can still go into the program cache, unspecialized
+    condition = loads(dumps(loop)).condition
+    assert isinstance(condition, BinaryOp) and condition.handler is None
+    print("✅ Specialized arithmetic working!")
+
+def test_list_indexing():
+    print("\nTesting list indexing...")
+
+    import sys
+    from values import BhaiList, make_list
+
+    code = '''
+    bhai xs = [10, 20, 30];
+    bhai bol(xs[0]);
+    bhai bol(xs[-1]);
+    xs[1] = 25;
+    bhai bol(xs);
+    bhai bol(xs[1:]);
+    bhai bol(xs[:2]);
+    bhai bol(lambai(xs));
+    bhai ys = xs;
+    ys[0] = "das";
+    bhai bol(xs);
+    bhai grid = [[1, 2], [3, 4]];
+    grid[1][0] = 9;
+    bhai bol(grid);
+    bhai bol("namaste"[2:4]);
+    bhai bol(range(10)[3:6]);
+    bhai bol(range(3) + [1.5]);
+    bhai bol(xs[5]);
+    '''
+    output = run_code(code)
+    assert output == run_code(code, BhaiVM)
+    assert output.startswith("10\n30\n[10, 25, 30]\n[25, 30]\n[10, 25]\n3\n['das', 25, 30]\n"
+                             "[[1, 2], [9, 4]]\nma\n[3, 4, 5]\n[0, 1, 2, 1.5]\n")
+    assert "Index 5 list ke bahar hai" in output
+
+    for code in ('bhai xs = [1]; xs[1.5] = 2;', 'bhai s = "ab"; s[0] = "c";',
+                 'bhai bol(lambai(5));', 'bhai n = 3; bhai bol(n[0]);'):
+        output = run_code(code)
+        assert output.startswith("RuntimeError") and output == run_code(code, BhaiVM)
+
+    # Only xs[i] can be assigned to
+    try:
+        Parser(Tokenizer('bhai xs = [1]; xs[0:1] = 2;').tokenize()).parse()
+        assert False, "Should have raised SyntaxError"
+    except SyntaxError as e:
+        assert "xs[0] = 5" in str(e)
+
+    # A yaad_rakh kaam can't change a global list
+    code = 'bhai xs = [1, 2]; yaad_rakh kaam f(n) { xs[0] = n; wapas n; } bhai bol(f(3));'
+    assert "pure hone chahiye" in run_code(code)
+    assert "pure hone chahiye" in run_code(code, BhaiVM)
+
+    # Numeric lists are array-backed until a different kind of value goes in
+    numbers = make_list([1, 2, 3])
+    assert numbers.typecode == 'q'
+    numbers[0] = 7
+    assert numbers.typecode == 'q' and numbers == [7, 2, 3]
+    numbers[1] = 2.5
+    assert numbers.typecode is None and numbers == [7, 2.5, 3]
+    assert make_list([0.5, 1.5]).typecode == 'd'
+    assert make_list([1, 2 ** 70]).typecode is None
+    assert (make_list([1]) + make_list([2])).typecode == 'q'
+    try:
+        make_list([1])[3] = "x"
+        assert False, "Should have raised IndexError"
+    except IndexError:
+        pass
+
+    interpreter = BhaiVM()
+    interpreter.execute(Parser(Tokenizer('bhai xs = range(5) + [5];').tokenize()).parse())
+    assert isinstance(interpreter.variables['xs'], BhaiList)
+    assert interpreter.variables['xs'].typecode == 'q'
+
+    # Several times less memory than a list of int objects
+    values = list(range(10 ** 6, 10 ** 6 + 100000))
+    packed = sys.getsizeof(make_list(values[:]).items)
+    plain = sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+    assert packed * 3 < plain
+
+    # A har_ek sees stores made during the loop, including one that turns
+    # the packed array into a list
+    code = 'bhai xs = [1, 2, 3, 4]; har_ek x in xs { xs[2] = "c"; xs[3] = 9; bhai bol(x); }'
+    assert run_code(code) == run_code(code, BhaiVM) == "1\n2\nc\n9\n"
+    print("✅ List indexing working!")
+
+def test_string_building():
+    print("\nTesting string building...")
+
+    from values import Rope
+
+    code = '''
+    bhai s = "";
+    bhai i = 0;
+    jab_tak (i chota 100) {
+        s = jod(s, "abcde");
+        i = i + 1;
+    }
+    bhai t = s;
+    s = s + "X";
+    t = t + "Y";
+    bhai bol(lambai(s));
+    bhai bol(s[499:]);
+    bhai bol(t[499:]);
+    bhai bol(s barabar t);
+    agar (s) { bhai bol("sahi"); }
+    bhai bol([s[0:3], 5 + t[-2:]]);
+    bhai bol(format("{} + {} = {}", 2, 3.5, [1, "a"]));
+    bhai bol(format("{}!", s)[500:]);
+    bhai bol(format("{} {}", 1));
+    '''
+    expected = ("501\neX\neY\n0\nsahi\n['abc', '5eY']\n2 + 3.5 = [1, 'a']\nX!\n"
+                "RuntimeError: ❌ Runtime Error: format mein 2 {} hain par 1 values di!")
+    assert run_code(code).startswith(expected)
+    assert run_code(code, BhaiVM).startswith(expected)
+
+    # Long strings are kept as a Rope inside the interpreter but come out as str
+    interpreter = BhaiVM()
+    interpreter.execute(Parser(Tokenizer(code.split("bhai t")[0]).tokenize()).parse())
+    slot = interpreter.symbols.index['s']
+    assert isinstance(interpreter.globals[slot], Rope)
+    assert interpreter.variables['s'] == "abcde" * 100
+    assert type(interpreter.variables['s']) is str
+
+    import bhai
+    value = bhai.compile('bhai s = "x"; har_ek i in range(1000) { s = s + "y"; } wapas s;').run()
+    assert value == "x" + "y" * 1000 and type(value) is str
+
+    # Two ropes grown from the same one don't see each other's pieces
+    base = Rope(["a" * 300, "b"], 301)
+    left, right = base.append("L"), base.append("R")
+    assert str(left).endswith("bL") and str(right).endswith("bR") and str(base).endswith("b")
+    assert str(base.append("!")).endswith("b!")
+    print("✅ String building working!")
+
+def test_tail_calls():
+    print("\nTesting tail calls...")
+
+    import sys
+    from memo import ReadOnlyGlobals
+
+    code = '''
+    kaam gin(n, acc) {
+        agar (n barabar 0) {
+            wapas acc;
+        }
+        wapas gin(ghata(n, 1), jod(acc, 1));
+    }
+    kaam even(n) {
+        agar (n barabar 0) { wapas 1; }
+        wapas odd(ghata(n, 1));
+    }
+    kaam odd(n) {
+        agar (n barabar 0) { wapas 0; }
+        wapas even(ghata(n, 1));
+    }
+    kaam sum(n) {
+        agar (n barabar 0) { wapas 0; }
+        wapas jod(n, sum(ghata(n, 1)));
+    }
+    bhai bol(gin(5000, 0));
+    bhai bol(even(3001));
+    bhai bol(sum(900));
+    '''
+    # wapas f(...) doesn't use up max_depth; other recursion goes as deep as it allows
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        assert run_code(code, interpreter_class) == "5000\n0\n405450\n"
+
+    # Tail calls are steps like any other call
+    steps = []
+    for interpreter_class in (BhaiInterpreter, BhaiVM):
+        interpreter = interpreter_class(output=BufferedOutput(io.StringIO()))
+        interpreter.execute(Parser(Tokenizer(code).tokenize()).parse())
+        steps.append(interpreter.steps_used)
+    assert steps[0] == steps[1]
+
+    # The VM keeps its own call stack, so depth is only limited by max_depth
+    limit = sys.getrecursionlimit()
+    deep = 'kaam sum(n) { agar (n barabar 0) { wapas 0; } wapas jod(n, sum(ghata(n, 1))); } wapas sum(5000);'
+    import bhai
+    assert bhai.compile(deep, max_depth=8000).run() == 12502500
+    assert "2000 calls se aage" in run_code(deep.replace("wapas sum(5000)", "sum(3000)"),
+                                             lambda: BhaiVM(max_depth=2000))
+    memo = 'yaad_rakh kaam f(n) { agar (n chota 2) { wapas n; } wapas jod(f(ghata(n, 1)), f(ghata(n, 2))); } wapas f(1500);'
+    vm_result = bhai.compile(memo, max_depth=2000).run()
+    assert sys.getrecursionlimit() == limit
+    assert vm_result == bhai.compile(memo, 'tree', max_depth=2000).run()
+
+    # The tree-walker only ever raises the process-wide limit, so runs in
+    # other threads never see it drop under them
+    assert sys.getrecursionlimit() >= 2000 * 12
+    from concurrent.futures import ThreadPoolExecutor
+    programs = [bhai.compile(deep.replace('5000', str(n)), 'tree', max_depth=n + 10)
+                for n in (300, 1200, 600, 2500)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda program: program.run(), programs * 3))
+    assert results == [n * (n + 1) // 2 for n in (300, 1200, 600, 2500)] * 3
+    raised = sys.getrecursionlimit()
+    bhai.compile(deep.replace('5000', '10'), 'tree', max_depth=100).run()
+    assert sys.getrecursionlimit() == raised
+
+    # An error deep inside yaad_rakh calls leaves the interpreter usable
+    interpreter = BhaiVM(output=BufferedOutput(io.StringIO()))
+    program = 'yaad_rakh kaam f(n) { agar (n barabar 0) { wapas bhag_kar(1, 0); } wapas jod(f(ghata(n, 1)), 1); }'
+    try:
+        interpreter.execute(Parser(Tokenizer(program + ' f(50);').tokenize()).parse())
+        assert False, "Should have raised RuntimeError"
+    except RuntimeError as e:
+        assert "Zero se divide" in str(e)
+    assert interpreter.frames == [] and not isinstance(interpreter.globals, ReadOnlyGlobals)
+    interpreter.execute(Parser(Tokenizer('bhai x = 5;').tokenize()).parse())
+    assert interpreter.variables['x'] == 5
+    print("✅ Tail calls working!")
+
+def test_stdlib():
+    print("\nTesting builtins...")
+
+    import bhai
+    from stdlib import BUILTINS
+    from compiler import compile_program
+
+    code = '''
+    bhai xs = [5, 3, 9, 1];
+    bhai bol(len(xs));
+    bhai bol(sum(xs));
+    bhai bol(min(xs));
+    bhai bol(max(2, 7.5, 3));
+    bhai bol(sort(xs));
+    bhai bol(xs);
+    bhai bol(join(xs, ", "));
+    bhai bol(str(xs) + "!");
+    bhai bol(int("42") + abs(-1));
+    bhai bol(sum(range(1, 1000000001)));
+    bhai bol(max(range(10, 0, -3)));
+    bhai bol(sort(["b", 1]));
+    '''
+    expected = ("4\n18\n1\n7.5\n[1, 3, 5, 9]\n[5, 3, 9, 1]\n5, 3, 9, 1\n[5, 3, 9, 1]!\n43\n"
+                "500000000500000000\n10\n"
+                "RuntimeError: ❌ Runtime Error: sort ke liye numbers aur strings mix nahi kar sakte!")
+    assert run_code(code).startswith(expected)
+    assert run_code(code, BhaiVM).startswith(expected)
+
+    for code in ('bhai bol(range());', 'bhai bol(min([]));', 'bhai bol(sum("ab"));', 'bhai bol(int("x"));'):
+        output = run_code(code)
+        assert output.startswith("RuntimeError") and output == run_code(code, BhaiVM)
+    assert "range ko 1 se 3 arguments chahiye, tumne 0 diye" in run_code('bhai bol(range());')
+
+    # A kaam with a builtin's name wins, and the lookup happens once per call site
+    code = 'kaam max(a, b) { wapas "mera"; } bhai bol(max(1, 2)); bhai bol(min(1, 2));'
+    assert run_code(code) == run_code(code, BhaiVM) == "mera\n1\n"
+    interpreter = BhaiVM()
+    interpreter.execute(Parser(Tokenizer('kaam sum(a) { wapas 0; }').tokenize()).parse())
+    ast = Parser(Tokenizer('bhai bol(sum([1]) + len([1]));').tokenize()).parse()
+    interpreter.resolve(ast)
+    call = ast.statements[0].expression
+    assert call.left.builtin is None and call.right.builtin is BUILTINS['len']
+    assert 'CALL_BUILTIN' in compile_program(ast).disassemble()
+
+    # Embedders can add their own
+    @bhai.builtin('discount', 2, 3)
+    def discount(interpreter, price, percent, extra=0):
+        if percent > 100:
+            interpreter.error("Itna discount? 🤑")
+        return price * (100 - percent - extra) / 100
+
+    try:
+        program = bhai.compile('wapas discount(200, 10);')
+        assert program.run() == 180.0
+        assert bhai.compile('wapas discount(200, 10, 5);', 'tree').run() == 170.0
+        try:
+            bhai.compile('wapas discount(200, 110);').run()
+            assert False, "Should have raised RuntimeError"
+        except RuntimeError as e:
+            assert "Itna discount?" in str(e)
+    finally:
+        del BUILTINS['discount']
+    print("✅ Builtins working!")
+
+def test_vector_mode():
+    print("\nTesting vector mode...")
+
+    import bhai
+    import vector
+
+    def run(code, engine='vm', vector=True):
+        output = io.StringIO()
+        try:
+            bhai.compile(code, engine, vector=vector).run(output=output)
+        except RuntimeError as e:
+            output.write(str(e).splitlines()[0])
+        return output.getvalue()
+
+    code = '''
+    bhai a = range(100);
+    bhai b = jod(guna(a, 3), a);
+    bhai bol(b[1:4]);
+    bhai bol(ghata(10, [1, 2.5]));
+    bhai bol(bhag_kar([3, 6], [2, 4]));
+    bhai bol(sum(b) + dot(a, a) + max(b));
+    bhai bol(jod(["x"], ["y"]));
+    bhai bol(jod(["a"], ["b", "c"]));
+    bhai big = guna(range(100), 4611686018427387904);
+    bhai bol(big[99]);
+    '''
+    expected = ("[4, 8, 12]\n[9, 7.5]\n[1.5, 1.5]\n348546\n['x', 'y']\n['a', 'b', 'c']\n"
+                "456556915824311402496\n")
+    errors = ('bhai bol(bhag_kar(range(100), 0));',
+              'bhai bol(bhag_kar([1, "a"], [0, 1]));',
+              'bhai bol(ghata(range(100), [1, "a"]));',
+              'bhai bol(guna([1, 2], [1, "a"]));',
+              'bhai bol(jod([1, 2], [3]));')
+    installed = vector.numpy
+    try:
+        # Same answers and the same errors with NumPy and without
+        for numpy in {installed, None}:
+            vector.numpy = numpy
+            assert run(code) == run(code, 'tree') == expected
+            for error in errors:
+                assert run(error) == run(error, 'tree')
+            # Results stay packed
+            interpreter = BhaiVM(vector=True)
+            interpreter.execute(Parser(Tokenizer('bhai r = guna(range(100), 0.5);').tokenize()).parse())
+            assert interpreter.globals[interpreter.symbols.index['r']].typecode == 'd'
+        assert "Zero se divide" in run(errors[0]) and "Zero se divide" in run(errors[1])
+        assert "numbers ka hi multiplication" in run(errors[3])
+        assert "lambai same honi chahiye" in run(errors[4])
+
+        # List times number either way round, packed and mixed, through NumPy
+        # when it's installed and the Python loop otherwise
+        scaled = '''
+        bhai packed = range(100);
+        bhai mixed = jod(["x"], range(99));
+        mixed[0] = 0.5;
+        bhai bol(guna(packed, 2)[99]);
+        bhai bol(guna(2, packed)[99]);
+        bhai bol(ghata(1, packed)[99]);
+        bhai bol(guna(mixed, 2)[:2]);
+        bhai bol(guna(2, mixed)[:2]);
+        bhai bol(bhag_kar(mixed, 2)[:2]);
+        bhai bol(guna([1, 2.5], 2));
+        bhai bol(guna(2, [1, 2.5]));
+        '''
+        expected = "198\n198\n-98\n[1.0, 0]\n[1.0, 0]\n[0.25, 0.0]\n[2, 5.0]\n[2, 5.0]\n"
+        if installed is None:
+            print("(NumPy not installed, skipping the NumPy path)")
+        for numpy in {installed, None}:
+            vector.numpy = numpy
+            assert run(scaled) == run(scaled, 'tree') == expected
+    finally:
+        vector.numpy = installed
+
+    # Off by default: + still joins lists, and list arithmetic is an error
+    assert run('bhai bol(jod([1, 2], [3]));', vector=False) == "[1, 2, 3]\n"
+    assert "numbers ka hi multiplication" in run('bhai bol(guna([1, 2], 2));', vector=False)
+    print("✅ Vector mode working!")
+
+def test_incremental_parse():
+    print("\nTesting incremental parsing...")
+
+    from incremental import Document, unfinished
+
+    def run(program):
+        output = io.StringIO()
+        BhaiInterpreter(output=BufferedOutput(output)).execute(program)
+        return output.getvalue()
+
+    source = ''.join(f'kaam f{n}(a) {{\n    wapas jod(a, {n});\n}}\nbhai bol(f{n}(1));\n'
+                     for n in range(50))
+    doc = Document(source)
+    assert doc.reparsed == 100 and not doc.diagnostics
+
+    # Change a number in the middle: only that kaam and its neighbour are parsed
+    at = source.index('jod(a, 25)') + len('jod(a, ')
+    diagnostics = doc.edit(at, at + 2, '250')
+    assert not diagnostics
+    assert doc.reparsed <= 3 and doc.reused >= 97
+    assert doc.text == source.replace('jod(a, 25)', 'jod(a, 250)')
+    assert run(doc.program) == run(Parser(Tokenizer(doc.text).tokenize()).parse())
+
+    # New lines above move the statements below without re-parsing them,
+    # and their ASTs are only renumbered once the program is asked for
+    last = doc.chunks[-1].node
+    stored = doc.chunk_list[-1].start
+    doc.edit(0, 0, 'bhai x = 1;\n')
+    doc.edit(0, 0, '\n')
+    assert doc.reparsed <= 2 and doc.chunk_list[-1].start == stored
+    assert doc.chunks[-1].line == 2 + 4 * 49 + 4 and last.line == 4 * 49 + 4
+    program = doc.program
+    assert program.statements[-1] is last and last.line == 2 + 4 * 49 + 4
+    assert last.expression.line == last.line
+    assert doc.program is program
+
+    # A typo is reported, the rest of the file still parses
+    at = doc.text.index('kaam f10')
+    diagnostics = doc.edit(at, at, '(')
+    assert len(diagnostics) == 1 and diagnostics[0].line == 43
+    assert len(doc.program.statements) == 100
+    diagnostics = doc.edit(at, at + 1, '')
+    assert not diagnostics and len(doc.program.statements) == 101
+
+    # An unclosed block is fixed by an edit further down
+    doc = Document('agar (1) {\nbhai bol(1);\nbhai bol(2);\n')
+    assert doc.diagnostics
+    diagnostics = doc.edit(len(doc.text), len(doc.text), '}\n')
+    assert not diagnostics and len(doc.program.statements) == 1
+
+    # A string over several lines is positioned where it starts
+    tokens = Tokenizer('bhai s = "a\nb";\nbhai t = 1;').tokenize()
+    assert (tokens[3].line, tokens[3].column) == (1, 10)
+    assert Tokenizer('bhai s = "a\nb";\nbhai t = 1;').tokenize_chars()[3].line == 1
+    assert tokens[6].line == 3
+
+    # The REPL keeps reading while a bracket is open
+    assert unfinished('kaam f() {')
+    assert unfinished('bhai bol(jod(1,')
+    assert not unfinished('kaam f() {\n wapas 1;\n}')
+    assert not unfinished('bhai bol("{");')
+    print("✅ Incremental parsing working!")
+
 if __name__ == "__main__":
     print("🇮🇳 BHAI-LANG TEST SUITE 🇮🇳")
     print("=" * 50)
@@ -114,6 +1420,30 @@ if __name__ == "__main__":
     test_loops()
     test_functions()
     test_errors()
+    test_vm_matches_tree_walker()
+    test_slot_resolution()
+    test_call_frames()
+    test_fast_tokenizer()
+    test_streaming_tokenizer()
+    test_program_cache()
+    test_optimizer()
+    test_lazy_range()
+    test_buffered_output()
+    test_for_each()
+    test_control_flow()
+    test_bench()
+    test_profiler()
+    test_memoization()
+    test_embed_api()
+    test_budgets()
+    test_run_many()
+    test_typed_arithmetic()
+    test_list_indexing()
+    test_string_building()
+    test_tail_calls()
+    test_stdlib()
+    test_incremental_parse()
+    test_vector_mode()
     
     print("\n" + "=" * 50)
     print("✅ ALL TESTS PASSED! Bhai-Lang is working! 🎉")
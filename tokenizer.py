@@ -1,4 +1,5 @@
 import re
+from sys import intern
 
 class TokenType:
     BHAI = 'BHAI'
@@ -18,6 +19,8 @@ class TokenType:
     NAHI = 'NAHI'
     BAS_KAR = 'BAS_KAR'
     AAGE_BADH = 'AAGE_BADH'
+    IN = 'IN'
+    YAAD_RAKH = 'YAAD_RAKH'
 
     JOD = 'JOD'
     GHATA = 'GHATA'
@@ -50,7 +53,52 @@ class TokenType:
     NEWLINE = 'NEWLINE'
     EOF = 'EOF'
 
+# Each match is optional whitespace and a comment followed by exactly one
+# token. OTHER catches anything else so finditer never skips input.
+TOKEN_PATTERN = re.compile(r'''
+    [ \t\r]*(?://[^\n]*)?
+    (?:
+        (?P<NAME>[A-Za-z_]\w*)
+      | (?P<OP>==|[-+*/=<>(){}\[\],;:.])
+      | (?P<NEWLINE>\n)
+      | (?P<NUMBER>[0-9][0-9.]*)
+      | (?P<STRING>"[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')
+      | (?P<END>\Z)
+      | (?P<OTHER>.)
+    )
+''', re.VERBOSE | re.DOTALL)
+
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ESCAPES = {'n': '\n', 't': '\t'}
+
+OPERATORS = {
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '=': TokenType.EQUALS,
+    '==': TokenType.BARABAR,
+    '>': TokenType.BADA,
+    '<': TokenType.CHOTA,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    ',': TokenType.COMMA,
+    ';': TokenType.SEMICOLON,
+    ':': TokenType.COLON,
+    '.': TokenType.DOT,
+}
+
+def unescape(match):
+    char = match.group(1)
+    return ESCAPES.get(char, char)
+
 class Token:
+    __slots__ = ('type', 'value', 'line', 'column')
+
     def __init__(self, type, value, line, column):
         self.type = type
         self.value = value
@@ -61,7 +109,7 @@ class Token:
         return f"Token({self.type}, {self.value}, {self.line}:{self.column})"
 
 class Tokenizer:
-    def __init__(self, code):
+    def __init__(self, code=''):
         self.code = code
         self.pos = 0
         self.line = 1
@@ -76,6 +124,7 @@ class Tokenizer:
             'jab_tak': TokenType.JAB_TAK,
             'har_ek': TokenType.HAR_EK,
             'kaam': TokenType.KAAM,
+            'yaad_rakh': TokenType.YAAD_RAKH,
             'wapas': TokenType.WAPAS,
             'koshish': TokenType.KOSHISH,
             'galti_se': TokenType.GALTI_SE,
@@ -90,7 +139,7 @@ class Tokenizer:
             'ghata': TokenType.GHATA,
             'guna': TokenType.GUNA,
             'bhag_kar': TokenType.BHAG_KAR,
-            'in': 'IN',
+            'in': TokenType.IN,
             'barabar': TokenType.BARABAR,
             'bada': TokenType.BADA,
             'chota': TokenType.CHOTA,
@@ -141,6 +190,7 @@ class Tokenizer:
                     self.line, start_col)
     
     def read_string(self):
+        start_line = self.line
         start_col = self.column
         quote_char = self.current_char()
         self.advance() 
@@ -163,7 +213,7 @@ class Tokenizer:
             self.error("Bhai, string khatam karna bhool gaye! Closing quote daalo!")
         
         self.advance() 
-        return Token(TokenType.STRING, string, self.line, start_col)
+        return Token(TokenType.STRING, string, start_line, start_col)
     
     def read_identifier(self):
         start_col = self.column
@@ -177,6 +227,116 @@ class Tokenizer:
         return Token(token_type, ident, self.line, start_col)
     
     def tokenize(self):
+        self.tokens.extend(self.iter_tokens())
+        return self.tokens
+
+    def iter_tokens(self):
+        yield from self.scan(final=True)
+
+    def stream(self, chunks):
+        # Tokenize text that arrives in pieces (a file object, a generator of
+        # lines, ...) without ever holding more than the unfinished tail of
+        # the input. A token that touches the end of the buffered text might
+        # continue in the next chunk, so it waits for more input.
+        for chunk in chunks:
+            if not chunk:
+                continue
+            self.code = self.code[self.pos:] + chunk
+            self.pos = 0
+            yield from self.scan(final=False)
+        yield from self.scan(final=True)
+
+    def scan(self, final):
+        # Fast scanner: one TOKEN_PATTERN match per token. Anything the
+        # pattern doesn't cover (non-ASCII names and digits, bad characters,
+        # unterminated strings) is handed to read_token so tokens and errors
+        # stay identical to tokenize_chars.
+        code = self.code
+        end = len(code)
+        more = not final
+        keywords = self.keywords
+        operators = OPERATORS
+        identifier = TokenType.IDENTIFIER
+        line = self.line
+        line_start = self.pos - self.column + 1
+
+        while True:
+            for m in TOKEN_PATTERN.finditer(code, self.pos):
+                kind = m.lastgroup
+
+                if more and (m.end() == end or kind == 'OTHER' and m.group(7) in '"\''):
+                    # Wait for the next chunk before deciding on this token
+                    self.pos = m.start()
+                    self.line = line
+                    self.column = self.pos - line_start + 1
+                    return
+
+                if kind == 'NAME':
+                    text = intern(m.group(1))
+                    yield Token(keywords.get(text, identifier), text, line, m.start(1) - line_start + 1)
+                    continue
+                elif kind == 'OP':
+                    text = m.group(2)
+                    yield Token(operators[text], text, line, m.start(2) - line_start + 1)
+                    continue
+                elif kind == 'NEWLINE':
+                    start = m.start(3)
+                    yield Token(TokenType.NEWLINE, '\\n', line, start - line_start + 1)
+                    line += 1
+                    line_start = start + 1
+                    continue
+                elif kind == 'NUMBER':
+                    start = m.start(4)
+                    stop = m.end()
+                    if stop >= end or code[stop] < '\x80':
+                        text = m.group(4)
+                        value = float(text) if '.' in text else int(text)
+                        yield Token(TokenType.NUMBER, value, line, start - line_start + 1)
+                        continue
+                elif kind == 'STRING':
+                    text = m.group(5)
+                    start = m.start(5)
+                    column = start - line_start + 1
+                    value = text[1:-1]
+                    if '\\' in value:
+                        value = ESCAPE_PATTERN.sub(unescape, value)
+                    yield Token(TokenType.STRING, value, line, column)
+                    newlines = text.count('\n')
+                    if newlines:
+                        line += newlines
+                        line_start = start + text.rindex('\n') + 1
+                    continue
+                elif kind == 'END':
+                    self.pos = end
+                    self.line = line
+                    self.column = end - line_start + 1
+                    yield Token(TokenType.EOF, None, self.line, self.column)
+                    return
+                else:
+                    start = m.start(7)
+
+                # Slow path, then restart the pattern after the token
+                self.pos = start
+                self.line = line
+                self.column = start - line_start + 1
+                try:
+                    token = self.read_token()
+                except (SyntaxError, ValueError, TypeError):
+                    if not (more and self.pos >= end):
+                        raise
+                    token = None
+                if more and self.pos >= end:
+                    self.pos = start
+                    self.line = line
+                    self.column = start - line_start + 1
+                    return
+                yield token
+                line = self.line
+                line_start = self.pos - self.column + 1
+                break
+
+    def tokenize_chars(self):
+        # Reference scanner: one character at a time
         while self.current_char():
             self.skip_whitespace()
             self.skip_comment()
@@ -184,78 +344,101 @@ class Tokenizer:
             if not self.current_char():
                 break
             
-            char = self.current_char()
-            col = self.column
+            self.tokens.append(self.read_token())
+        
+        self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
+        return self.tokens
 
-            if char.isdigit():
-                self.tokens.append(self.read_number())
-            elif char in '"\'':
-                self.tokens.append(self.read_string())
+    def read_token(self):
+        char = self.current_char()
+        col = self.column
 
-            elif char.isalpha() or char == '_':
-                self.tokens.append(self.read_identifier())
+        if char.isdigit():
+            return self.read_number()
+        elif char in '"\'':
+            return self.read_string()
 
-            elif char == '+':
-                self.tokens.append(Token(TokenType.PLUS, '+', self.line, col))
-                self.advance()
-            elif char == '-':
-                self.tokens.append(Token(TokenType.MINUS, '-', self.line, col))
-                self.advance()
-            elif char == '*':
-                self.tokens.append(Token(TokenType.MULTIPLY, '*', self.line, col))
-                self.advance()
-            elif char == '/':
-                self.tokens.append(Token(TokenType.DIVIDE, '/', self.line, col))
-                self.advance()
-            elif char == '=':
-                if self.peek_char() == '=':
-                    self.tokens.append(Token(TokenType.BARABAR, '==', self.line, col))
-                    self.advance()
-                    self.advance()
-                else:
-                    self.tokens.append(Token(TokenType.EQUALS, '=', self.line, col))
-                    self.advance()
-            elif char == '>':
-                self.tokens.append(Token(TokenType.BADA, '>', self.line, col))
-                self.advance()
-            elif char == '<':
-                self.tokens.append(Token(TokenType.CHOTA, '<', self.line, col))
-                self.advance()
-            elif char == '(':
-                self.tokens.append(Token(TokenType.LPAREN, '(', self.line, col))
-                self.advance()
-            elif char == ')':
-                self.tokens.append(Token(TokenType.RPAREN, ')', self.line, col))
-                self.advance()
-            elif char == '{':
-                self.tokens.append(Token(TokenType.LBRACE, '{', self.line, col))
-                self.advance()
-            elif char == '}':
-                self.tokens.append(Token(TokenType.RBRACE, '}', self.line, col))
-                self.advance()
-            elif char == '[':
-                self.tokens.append(Token(TokenType.LBRACKET, '[', self.line, col))
-                self.advance()
-            elif char == ']':
-                self.tokens.append(Token(TokenType.RBRACKET, ']', self.line, col))
-                self.advance()
-            elif char == ',':
-                self.tokens.append(Token(TokenType.COMMA, ',', self.line, col))
-                self.advance()
-            elif char == ';':
-                self.tokens.append(Token(TokenType.SEMICOLON, ';', self.line, col))
-                self.advance()
-            elif char == ':':
-                self.tokens.append(Token(TokenType.COLON, ':', self.line, col))
-                self.advance()
-            elif char == '.':
-                self.tokens.append(Token(TokenType.DOT, '.', self.line, col))
+        elif char.isalpha() or char == '_':
+            return self.read_identifier()
+
+        elif char == '+':
+            token = Token(TokenType.PLUS, '+', self.line, col)
+            self.advance()
+            return token
+        elif char == '-':
+            token = Token(TokenType.MINUS, '-', self.line, col)
+            self.advance()
+            return token
+        elif char == '*':
+            token = Token(TokenType.MULTIPLY, '*', self.line, col)
+            self.advance()
+            return token
+        elif char == '/':
+            token = Token(TokenType.DIVIDE, '/', self.line, col)
+            self.advance()
+            return token
+        elif char == '=':
+            if self.peek_char() == '=':
+                token = Token(TokenType.BARABAR, '==', self.line, col)
                 self.advance()
-            elif char == '\n':
-                self.tokens.append(Token(TokenType.NEWLINE, '\\n', self.line, col))
                 self.advance()
+                return token
             else:
-                self.error(f"Ye '{char}' kya hai bhai? Invalid character!")
-        
-        self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return self.tokens
+                token = Token(TokenType.EQUALS, '=', self.line, col)
+                self.advance()
+                return token
+        elif char == '>':
+            token = Token(TokenType.BADA, '>', self.line, col)
+            self.advance()
+            return token
+        elif char == '<':
+            token = Token(TokenType.CHOTA, '<', self.line, col)
+            self.advance()
+            return token
+        elif char == '(':
+            token = Token(TokenType.LPAREN, '(', self.line, col)
+            self.advance()
+            return token
+        elif char == ')':
+            token = Token(TokenType.RPAREN, ')', self.line, col)
+            self.advance()
+            return token
+        elif char == '{':
+            token = Token(TokenType.LBRACE, '{', self.line, col)
+            self.advance()
+            return token
+        elif char == '}':
+            token = Token(TokenType.RBRACE, '}', self.line, col)
+            self.advance()
+            return token
+        elif char == '[':
+            token = Token(TokenType.LBRACKET, '[', self.line, col)
+            self.advance()
+            return token
+        elif char == ']':
+            token = Token(TokenType.RBRACKET, ']', self.line, col)
+            self.advance()
+            return token
+        elif char == ',':
+            token = Token(TokenType.COMMA, ',', self.line, col)
+            self.advance()
+            return token
+        elif char == ';':
+            token = Token(TokenType.SEMICOLON, ';', self.line, col)
+            self.advance()
+            return token
+        elif char == ':':
+            token = Token(TokenType.COLON, ':', self.line, col)
+            self.advance()
+            return token
+        elif char == '.':
+            token = Token(TokenType.DOT, '.', self.line, col)
+            self.advance()
+            return token
+        elif char == '\n':
+            token = Token(TokenType.NEWLINE, '\\n', self.line, col)
+            self.advance()
+            return token
+        else:
+            self.error(f"Ye '{char}' kya hai bhai? Invalid character!")
+
@@ -0,0 +1,313 @@
+from array import array
+from itertools import islice
+
+class BhaiRange:
+    # What range(...) returns: behaves like the list it used to build, but
+    # only stores start/stop/step so range(10000000) costs the same as range(3).
+    __slots__ = ('range',)
+
+    def __init__(self, *args):
+        self.range = range(*args)
+
+    def __len__(self):
+        return len(self.range)
+
+    def __iter__(self):
+        return iter(self.range)
+
+    def __reversed__(self):
+        return reversed(self.range)
+
+    def __contains__(self, value):
+        return value in self.range
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result = BhaiRange.__new__(BhaiRange)
+            result.range = self.range[index]
+            return result
+        return self.range[index]
+
+    def __repr__(self):
+        # Same text as printing the old list, built without holding the list
+        return '[' + ', '.join(map(str, self.range)) + ']'
+
+    def __eq__(self, other):
+        if isinstance(other, (BhaiRange, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __lt__(self, other):
+        if isinstance(other, (BhaiRange, list)):
+            return list(self) < list(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (BhaiRange, list)):
+            return list(self) > list(other)
+        return NotImplemented
+
+    def __add__(self, other):
+        if isinstance(other, (BhaiRange, BhaiList, list)):
+            return join(self, other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return join(other, self)
+        return NotImplemented
+
+class BhaiList:
+    # A bhai list. While it holds only ints or only floats the values live
+    # in an array ('q' or 'd'): 8 bytes each instead of a pointer plus a
+    # boxed number. Storing anything else - a string, an int in a float
+    # list, an int too big for 64 bits - turns it into a plain list for good.
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        items = self.items
+        if items.__class__ is array:
+            return self.iter_array(items)
+        return iter(items)
+
+    def iter_array(self, items):
+        # A store can swap the array for a list while a har_ek is walking
+        # it; carry on in the list from the same position so the loop sees
+        # that store like any other
+        for index, value in enumerate(items):
+            if self.items is not items:
+                yield from islice(self.items, index, None)
+                return
+            yield value
+
+    def __contains__(self, value):
+        return value in self.items
+
+    def __getitem__(self, index):
+        if index.__class__ is slice:
+            return BhaiList(self.items[index])
+        return self.items[index]
+
+    def __setitem__(self, index, value):
+        items = self.items
+        if items.__class__ is array:
+            if value.__class__ is (int if items.typecode == 'q' else float):
+                try:
+                    items[index] = value
+                    return
+                except OverflowError:
+                    pass
+            # An index out of range fails here, before the list is converted
+            items[index]
+            items = self.items = items.tolist()
+        items[index] = value
+
+    @property
+    def typecode(self):
+        # 'q' or 'd' while array-backed, None once it is a plain list
+        items = self.items
+        return items.typecode if items.__class__ is array else None
+
+    def __repr__(self):
+        items = self.items
+        if items.__class__ is array:
+            items = items.tolist()
+        return repr(items)
+
+    def __eq__(self, other):
+        if isinstance(other, BhaiList):
+            other = other.items
+        elif not isinstance(other, (BhaiRange, list)):
+            return NotImplemented
+        items = self.items
+        if items.__class__ is other.__class__:
+            return items == other
+        return len(items) == len(other) and all(a == b for a, b in zip(items, other))
+
+    __hash__ = None
+
+    def __lt__(self, other):
+        if isinstance(other, (BhaiRange, BhaiList, list)):
+            return list(self) < list(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (BhaiRange, BhaiList, list)):
+            return list(self) > list(other)
+        return NotImplemented
+
+    def __add__(self, other):
+        if isinstance(other, (BhaiRange, BhaiList, list)):
+            return join(self, other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, (BhaiRange, list)):
+            return join(other, self)
+        return NotImplemented
+
+def make_list(values):
+    # `values` is a fresh Python list; it is kept, not copied
+    if values:
+        first = values[0].__class__
+        if first is int:
+            try:
+                return BhaiList(array('q', values))
+            except (TypeError, OverflowError):
+                pass
+        elif first is float and set(map(type, values)) == {float}:
+            return BhaiList(array('d', values))
+    return BhaiList(values)
+
+def storage(value):
+    if isinstance(value, BhaiList):
+        return value.items
+    if isinstance(value, BhaiRange):
+        try:
+            return array('q', value.range)
+        except OverflowError:
+            return list(value.range)
+    return value
+
+def join(left, right):
+    # left + right for any mix of lists and ranges. Two arrays of the same
+    # type are joined as arrays; an empty side takes on the other's storage.
+    left = storage(left)
+    right = storage(right)
+    if not left:
+        return BhaiList(right[:])
+    if not right:
+        return BhaiList(left[:])
+    if left.__class__ is array and right.__class__ is array and left.typecode == right.typecode:
+        return BhaiList(left + right)
+    if left.__class__ is list and right.__class__ is list:
+        return make_list(left + right)
+    return make_list(list(left) + list(right))
+
+class Rope:
+    # A string built up by +. Each piece is appended to a list shared by
+    # every Rope grown from the same start, so s = jod(s, x) in a loop is
+    # O(1) per step instead of copying s. The pieces are joined once, the
+    # first time the text is needed: bol, comparisons, indexing, looping.
+    __slots__ = ('parts', 'count', 'length', 'text')
+
+    def __init__(self, parts, length):
+        self.parts = parts
+        self.count = len(parts)
+        self.length = length
+        self.text = None
+
+    def append(self, piece):
+        parts = self.parts
+        if len(parts) != self.count:
+            # This rope was already grown another way; branch off
+            parts = parts[:self.count]
+        parts.append(piece)
+        return Rope(parts, self.length + len(piece))
+
+    def __str__(self):
+        text = self.text
+        if text is None:
+            parts = self.parts
+            text = self.text = ''.join(parts if len(parts) == self.count else parts[:self.count])
+            # Later appends start from the joined text
+            self.parts = [text]
+            self.count = 1
+        return text
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __contains__(self, value):
+        return value in str(self)
+
+    def __getitem__(self, index):
+        return str(self)[index]
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __eq__(self, other):
+        if other.__class__ is Rope or isinstance(other, str):
+            return len(other) == self.length and str(self) == str(other)
+        return NotImplemented
+
+    # Compared as plain strings, so mixing with a number fails the same way
+    def __lt__(self, other):
+        return str(self) < text(other)
+
+    def __gt__(self, other):
+        return str(self) > text(other)
+
+    def __neg__(self):
+        return -str(self)
+
+def text(value):
+    # The str behind a Rope; anything else is returned as it is
+    return str(value) if value.__class__ is Rope else value
+
+def plain(value, seen=None):
+    # The value as ordinary Python data for code embedding Bhai: lists,
+    # ranges and ropes become list and str, all the way down. A list that
+    # contains itself comes back as a list that contains itself.
+    cls = value.__class__
+    if cls is Rope:
+        return str(value)
+    if cls is BhaiRange:
+        return list(value.range)
+    if cls is not BhaiList and cls is not list:
+        return value
+    if seen is None:
+        seen = {}
+    result = seen.get(id(value))
+    if result is None:
+        result = seen[id(value)] = []
+        result.extend(plain(item, seen) for item in value)
+    return result
+
+def bhai_value(value, seen=None):
+    # The reverse of plain(), for globals handed in by embedding code: list,
+    # tuple and range become new BhaiLists all the way down, so the program
+    # never stores into the caller's list.
+    cls = value.__class__
+    if cls is range:
+        return make_list(list(value))
+    if cls is not list and cls is not tuple:
+        return value
+    if seen is None:
+        seen = {}
+    result = seen.get(id(value))
+    if result is None:
+        result = seen[id(value)] = BhaiList([])
+        result.items = make_list([bhai_value(item, seen) for item in value]).items
+    return result
+
+def copy_list(value, seen=None):
+    # A copy of a list and every list inside it, for results that must not
+    # share elements with the caller (yaad_rakh caches)
+    if seen is None:
+        seen = {}
+    result = seen.get(id(value))
+    if result is None:
+        items = value.items
+        if items.__class__ is array:
+            result = seen[id(value)] = BhaiList(items[:])
+        else:
+            result = seen[id(value)] = BhaiList([])
+            result.items.extend(copy_list(item, seen) if item.__class__ is BhaiList else item
+                                for item in items)
+    return result
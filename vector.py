@@ -0,0 +1,192 @@
+import operator
+from array import array
+from tokenizer import TokenType
+from values import BhaiRange, BhaiList, make_list, storage
+
+# NumPy is optional: without it vector mode runs the same loops in Python
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Operand types arithmetic accepts (not bool, not subclasses)
+NUMBERS = frozenset((int, float))
+
+# What counts as a list for element-wise arithmetic
+VECTORS = frozenset((BhaiList, BhaiRange))
+
+OPERATORS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.MULTIPLY: operator.mul,
+    TokenType.DIVIDE: operator.truediv,
+}
+
+# The scalar path's messages, so a bad element fails the same way
+TYPE_ERRORS = {
+    TokenType.MINUS: "Bhai, numbers ka hi subtraction hota hai! "
+                     "String se kya ghata rahe ho? 🤷‍♂️",
+    TokenType.MULTIPLY: "Bhai, numbers ka hi multiplication hota hai!",
+    TokenType.DIVIDE: "Bhai, numbers ka hi division hota hai!",
+}
+ZERO_DIVISION = "Arre bhai! Zero se divide kar rahe ho? Maths class mein soye the kya? 💤"
+
+# Below this many elements a Python loop beats the cost of calling NumPy
+NUMPY_MIN = 64
+
+# int64 results are only used when the inputs prove they can't wrap; int
+# division also needs both sides exact as float64 to round like Python
+INT64_MAX = 2 ** 63 - 1
+FLOAT_EXACT = 2 ** 53
+
+def elementwise(interpreter, op, left, right):
+    # + - * / in vector mode, when a list meets a list of the same length or
+    # a number. Returns None where the operator keeps its usual meaning: +
+    # still joins lists that aren't all numbers, and a list next to a string
+    # is left to the scalar path.
+    function = OPERATORS.get(op)
+    if function is None:
+        return None
+    if left.__class__ in VECTORS:
+        if right.__class__ not in VECTORS and right.__class__ not in NUMBERS:
+            return None
+    elif left.__class__ not in NUMBERS or right.__class__ not in VECTORS:
+        return None
+
+    a = values(interpreter, left)
+    b = values(interpreter, right)
+    numeric = is_numeric(a) and is_numeric(b)
+    if not numeric and op == TokenType.PLUS:
+        return None
+    if a.__class__ not in NUMBERS and b.__class__ not in NUMBERS:
+        check_lengths(interpreter, a, b)
+    if not numeric:
+        return make_list(checked_loop(interpreter, op, function, a, b))
+
+    if op == TokenType.DIVIDE and (b == 0 if b.__class__ in NUMBERS else 0 in b):
+        interpreter.error(ZERO_DIVISION)
+    if numpy is not None:
+        result = with_numpy(op, a, b)
+        if result is not None:
+            return result
+    if a.__class__ in NUMBERS:
+        result = [function(a, y) for y in b]
+    elif b.__class__ in NUMBERS:
+        result = [function(x, b) for x in a]
+    else:
+        result = list(map(function, a, b))
+    return make_list(result)
+
+def values(interpreter, value):
+    # The numbers behind an operand: a number as is, a list's storage
+    if value.__class__ is BhaiRange:
+        interpreter.check_size(value)
+    return storage(value)
+
+def check_lengths(interpreter, a, b):
+    if len(a) != len(b):
+        interpreter.error(f'Dono lists ki lambai same honi chahiye bhai, '
+                          f'{len(a)} aur {len(b)} nahi chalega! 📏')
+
+def is_numeric(value):
+    if value.__class__ in NUMBERS or value.__class__ is array:
+        return True
+    return all(item.__class__ in NUMBERS for item in value)
+
+def checked_loop(interpreter, op, function, a, b):
+    # Some element isn't a number: go one pair at a time so the first bad
+    # one raises exactly what the scalar operator would
+    if a.__class__ in NUMBERS:
+        pairs = ((a, y) for y in b)
+    elif b.__class__ in NUMBERS:
+        pairs = ((x, b) for x in a)
+    else:
+        pairs = zip(a, b)
+    result = []
+    for x, y in pairs:
+        if x.__class__ not in NUMBERS or y.__class__ not in NUMBERS:
+            interpreter.error(TYPE_ERRORS[op])
+        if op == TokenType.DIVIDE and y == 0:
+            interpreter.error(ZERO_DIVISION)
+        result.append(function(x, y))
+    return result
+
+def bounds(value):
+    # Largest magnitude of an int operand, as a Python int
+    if value.__class__ is int:
+        return abs(value)
+    return max(abs(int(value.min())), abs(int(value.max()))) if len(value) else 0
+
+def with_numpy(op, a, b):
+    # Only packed arrays go through NumPy, and int64 only when the result
+    # provably fits. Anything else returns None for the Python loop.
+    if a.__class__ is not array and b.__class__ is not array:
+        return None
+    size = len(b) if a.__class__ in NUMBERS else len(a)
+    if size < NUMPY_MIN:
+        return None
+    a = to_numpy(a)
+    b = to_numpy(b)
+    if a is None or b is None:
+        return None
+    if is_int(a) and is_int(b):
+        left, right = bounds(a), bounds(b)
+        if op == TokenType.MULTIPLY:
+            safe = left * right <= INT64_MAX
+        elif op == TokenType.DIVIDE:
+            safe = left <= FLOAT_EXACT and right <= FLOAT_EXACT
+        else:
+            safe = left + right <= INT64_MAX
+        if not safe:
+            return None
+    with numpy.errstate(all='ignore'):
+        if op == TokenType.PLUS:
+            result = numpy.add(a, b)
+        elif op == TokenType.MINUS:
+            result = numpy.subtract(a, b)
+        elif op == TokenType.MULTIPLY:
+            result = numpy.multiply(a, b)
+        else:
+            result = numpy.true_divide(a, b)
+    return BhaiList(array('q' if result.dtype == numpy.int64 else 'd', result.tobytes()))
+
+def to_numpy(value):
+    if value.__class__ is array:
+        return numpy.frombuffer(value, dtype=numpy.int64 if value.typecode == 'q' else numpy.float64)
+    if value.__class__ is int:
+        return value if -INT64_MAX <= value <= INT64_MAX else None
+    # A float, or None for a list with mixed or oversized numbers
+    return value if value.__class__ is float else None
+
+def is_int(value):
+    if value.__class__ is int or value.__class__ is float:
+        return value.__class__ is int
+    return value.dtype == numpy.int64
+
+# Reductions over packed int lists. Float ones stay in Python: NumPy adds
+# in a different order, and the answer shouldn't depend on what's installed.
+
+def packed_ints(items):
+    if (numpy is None or items.__class__ is not array or items.typecode != 'q'
+            or len(items) < NUMPY_MIN):
+        return None
+    return to_numpy(items)
+
+def int_sum(items):
+    # sum(), or None when NumPy can't do it exactly
+    data = packed_ints(items)
+    if data is None or bounds(data) * len(data) > INT64_MAX:
+        return None
+    return int(data.sum())
+
+def int_extreme(items, pick):
+    data = packed_ints(items)
+    if data is None:
+        return None
+    return int(data.min() if pick is min else data.max())
+
+def int_dot(a, b):
+    left, right = packed_ints(a), packed_ints(b)
+    if left is None or right is None or bounds(left) * bounds(right) * len(left) > INT64_MAX:
+        return None
+    return int(numpy.dot(left, right))
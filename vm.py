@@ -0,0 +1,332 @@
+from parser import Program
+from tokenizer import TokenType
+from interpreter import BhaiInterpreter, Frame
+from resolver import UNSET
+from values import make_list, text
+from memo import MISSING, ReadOnlyGlobals, memo_key
+from compiler import Op, OPNAMES, Compiler
+
+CONST_OPS = {Op.LOAD_CONST, Op.MAKE_FUNCTION, Op.LOAD_FUNCTION, Op.CALL_BUILTIN}
+JUMP_OPS = {Op.JUMP, Op.JUMP_BACK, Op.JUMP_IF_FALSE, Op.FOR_ITER}
+
+# What handlers return to make run_code leave, enter or replace a kaam
+RETURN = -1
+CALL = -2
+TAIL_CALL = -3
+
+class BhaiVM(BhaiInterpreter):
+    # Runs compiled bytecode instead of walking the AST. Each opcode has an
+    # op_<name> handler; handlers return None to fall through or a new pc.
+    # A negative pc is RETURN, CALL or TAIL_CALL.
+    #
+    # Calls don't recurse in Python: CALL saves the caller's code, pc and
+    # stack and run_code carries on with the callee, so recursion depth is
+    # only limited by max_depth. TAIL_CALL (wapas f(...) in a kaam) reuses
+    # the caller's frame and doesn't count towards max_depth at all.
+
+    handlers = []
+
+    @classmethod
+    def build_handlers(cls):
+        cls.handlers = [getattr(cls, 'op_' + name.lower()) for name in OPNAMES]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.build_handlers()
+
+    def execute(self, node):
+        if not isinstance(node, Program):
+            node = Program([node])
+        return self.run_program(self.prepare(node))
+
+    def prepare(self, program):
+        self.resolve(program)
+        code = Compiler().compile_program(program)
+        self.load(code)
+        return code
+
+    def run_program(self, code):
+        self.reset_frames()
+        self.start_budget()
+        try:
+            return text(self.run_code(code))
+        except RecursionError:
+            self.reset_frames()
+            self.too_deep()
+        finally:
+            self.output.flush()
+
+    def run_code(self, code):
+        program = self.load(code)
+        stack = []
+        pc = 0
+        # The running kaam's memo entry (table, key, globals to restore),
+        # and a (program, pc, stack, memo, locals) per caller
+        memo = None
+        calls = []
+        frames = self.frames
+        depth = len(frames)
+        saved_locals = self.locals
+        saved_globals = self.globals
+        try:
+            while True:
+                handler, arg = program[pc]
+                pc += 1
+                target = handler(self, stack, arg)
+                if target is None:
+                    continue
+                if target >= 0:
+                    pc = target
+                    continue
+
+                if target == RETURN:
+                    value = stack.pop() if stack else None
+                    if memo is not None:
+                        table, key, self.globals = memo
+                        table.put(key, value)
+                    if not calls:
+                        return value
+                    frames.pop()
+                    program, pc, stack, memo, self.locals = calls.pop()
+                    stack.append(value)
+                    continue
+
+                # CALL or TAIL_CALL: the kaam and its arguments are on the stack
+                func = stack[-arg - 1]
+                args = stack[-arg:] if arg else []
+                del stack[-arg - 1:]
+                callee_memo = None
+                if func.memoize:
+                    table = self.memo_table(func)
+                    key = memo_key(args)
+                    result = table.get(key)
+                    if result is not MISSING:
+                        stack.append(result)
+                        continue
+                    callee_memo = (table, key, self.globals)
+                elif target == TAIL_CALL and memo is None:
+                    self.countdown -= 1
+                    if not self.countdown:
+                        self.checkpoint()
+                    frames[-1] = Frame(func, self.make_locals(func, args))
+                    self.locals = frames[-1].locals
+                    program = self.load(func)
+                    stack = []
+                    pc = 0
+                    continue
+
+                locals = self.enter(func, args)
+                calls.append((program, pc, stack, memo, self.locals))
+                if callee_memo is not None and not isinstance(self.globals, ReadOnlyGlobals):
+                    self.globals = ReadOnlyGlobals(self.globals, self, func)
+                program = self.load(func)
+                stack = []
+                pc = 0
+                memo = callee_memo
+                self.locals = locals
+        except BaseException:
+            # Unwind every kaam this call started
+            del frames[depth:]
+            self.locals = saved_locals
+            self.globals = saved_globals
+            raise
+
+    def load(self, code):
+        # Decode the flat bytecode once into (handler, operand) pairs with
+        # constants and jump targets already resolved.
+        program = code.loaded.get(type(self))
+        if program is None:
+            program = []
+            instructions = code.code
+            for pc in range(0, len(instructions), 2):
+                op = instructions[pc]
+                arg = instructions[pc + 1]
+                if op in CONST_OPS:
+                    arg = code.consts[arg]
+                elif op in JUMP_OPS:
+                    arg //= 2
+                program.append((self.handlers[op], arg))
+            code.loaded[type(self)] = program
+        return program
+
+    # -- handlers --
+
+    def op_load_const(self, stack, arg):
+        stack.append(arg)
+
+    def op_load_global(self, stack, arg):
+        value = self.globals[arg]
+        if value is UNSET:
+            self.undefined_variable(self.symbols.names[arg])
+        stack.append(value)
+
+    def op_store_global(self, stack, arg):
+        self.globals[arg] = stack.pop()
+
+    def op_load_fast(self, stack, arg):
+        value = self.locals[arg]
+        if value is UNSET:
+            self.undefined_variable(self.frames[-1].function.local_names[arg])
+        stack.append(value)
+
+    def op_store_fast(self, stack, arg):
+        self.locals[arg] = stack.pop()
+
+    def op_pop_top(self, stack, arg):
+        stack.pop()
+
+    def op_binary_add(self, stack, arg):
+        right = stack.pop()
+        left = stack[-1]
+        if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+            stack[-1] = left + right
+        else:
+            result = self.vectorize(TokenType.PLUS, left, right) if self.vector else None
+            stack[-1] = self.concat(left, right) if result is None else result
+
+    def op_binary_sub(self, stack, arg):
+        right = stack.pop()
+        left = stack[-1]
+        if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+            if self.vector:
+                result = self.vectorize(TokenType.MINUS, left, right)
+                if result is not None:
+                    stack[-1] = result
+                    return
+            self.error("Bhai, numbers ka hi subtraction hota hai! "
+                     "String se kya ghata rahe ho? 🤷‍♂️")
+        stack[-1] = left - right
+
+    def op_binary_mul(self, stack, arg):
+        right = stack.pop()
+        left = stack[-1]
+        if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+            if self.vector:
+                result = self.vectorize(TokenType.MULTIPLY, left, right)
+                if result is not None:
+                    stack[-1] = result
+                    return
+            self.error("Bhai, numbers ka hi multiplication hota hai!")
+        stack[-1] = left * right
+
+    def op_binary_div(self, stack, arg):
+        right = stack.pop()
+        left = stack[-1]
+        if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+            if self.vector:
+                result = self.vectorize(TokenType.DIVIDE, left, right)
+                if result is not None:
+                    stack[-1] = result
+                    return
+            self.error("Bhai, numbers ka hi division hota hai!")
+        if right == 0:
+            self.error("Arre bhai! Zero se divide kar rahe ho? "
+                     "Maths class mein soye the kya? 💤")
+        stack[-1] = left / right
+
+    def op_compare_eq(self, stack, arg):
+        right = stack.pop()
+        stack[-1] = 1 if stack[-1] == right else 0
+
+    def op_compare_gt(self, stack, arg):
+        right = stack.pop()
+        stack[-1] = 1 if stack[-1] > right else 0
+
+    def op_compare_lt(self, stack, arg):
+        right = stack.pop()
+        stack[-1] = 1 if stack[-1] < right else 0
+
+    def op_unary_neg(self, stack, arg):
+        stack[-1] = -stack[-1]
+
+    def op_jump(self, stack, arg):
+        return arg
+
+    def op_jump_back(self, stack, arg):
+        # Loop back-edges are where the step budget is counted
+        self.countdown -= 1
+        if not self.countdown:
+            self.checkpoint()
+        return arg
+
+    def op_jump_if_false(self, stack, arg):
+        value = stack.pop()
+        if value == 0 or value == "" or value is None:
+            return arg
+
+    def op_print(self, stack, arg):
+        self.output.write_line(self.render(stack.pop()))
+
+    def op_build_list(self, stack, arg):
+        if arg:
+            elements = stack[-arg:]
+            del stack[-arg:]
+        else:
+            elements = []
+        stack.append(make_list(elements))
+
+    def op_make_function(self, stack, arg):
+        self.functions[arg.name] = arg
+
+    def op_load_function(self, stack, arg):
+        name, argc = arg
+        if name not in self.functions:
+            self.error(f'Function "{name}" define hi nahi hai bhai! '
+                      f'Pehle define karo phir call karo! 🤔')
+
+        func = self.functions[name]
+
+        if argc != len(func.params):
+            self.error(f'Function "{name}" ko {len(func.params)} arguments chahiye, '
+                      f'tumne {argc} diye! Count toh sahi karo! 🔢')
+        stack.append(func)
+
+    def op_call(self, stack, arg):
+        return CALL
+
+    def op_tail_call(self, stack, arg):
+        return TAIL_CALL
+
+    def op_call_builtin(self, stack, arg):
+        builtin, argc = arg
+        if argc:
+            args = stack[-argc:]
+            del stack[-argc:]
+        else:
+            args = []
+        stack.append(self.call_builtin(builtin, args))
+
+    def op_return_value(self, stack, arg):
+        return RETURN
+
+    def op_halt(self, stack, arg):
+        return RETURN
+
+    def op_get_iter(self, stack, arg):
+        stack[-1] = self.iterate(stack[-1])
+
+    def op_for_iter(self, stack, arg):
+        item = next(stack[-1], UNSET)
+        if item is UNSET:
+            stack.pop()
+            return arg
+        stack.append(item)
+
+    def op_index(self, stack, arg):
+        index = stack.pop()
+        stack[-1] = self.get_item(stack[-1], index)
+
+    def op_slice(self, stack, arg):
+        stop = stack.pop()
+        start = stack.pop()
+        stack[-1] = self.get_slice(stack[-1], start, stop)
+
+    def op_store_index(self, stack, arg):
+        value = stack.pop()
+        index = stack.pop()
+        target = stack.pop()
+        if self.globals.__class__ is ReadOnlyGlobals:
+            self.pure_store(arg if arg >= 0 else None, target)
+        self.set_item(target, index, value)
+
+BhaiVM.build_handlers()